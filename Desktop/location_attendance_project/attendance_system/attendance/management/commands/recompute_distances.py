@@ -0,0 +1,96 @@
+import math
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from attendance.models import Attendance
+from attendance.utils import calculate_distances
+
+FIELDS = (
+    'pk',
+    'employee__office_latitude', 'employee__office_longitude',
+    'check_in_latitude', 'check_in_longitude',
+    'check_out_latitude', 'check_out_longitude',
+    'check_in_distance', 'check_out_distance',
+)
+
+
+def _stored(distances):
+    """Turn calculate_distances output into values for the FloatFields"""
+    return [None if math.isnan(distance) else distance for distance in distances.tolist()]
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute check-in and check-out distances of attendance records "
+        "from each employee's current office location"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=10000,
+            help="Records read and updated per transaction (default: 10000)",
+        )
+        parser.add_argument(
+            '--employee', metavar='EMPLOYEE_ID',
+            help="Only recompute records of this employee, e.g. after their office moved",
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Count the records that would change without saving them",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        queryset = Attendance.objects.order_by('pk')
+        if options['employee']:
+            queryset = queryset.filter(employee__employee_id=options['employee'])
+
+        scanned = changed = 0
+        last_pk = 0
+        start = time.perf_counter()
+
+        # Walk the table by primary key so every chunk is one indexed range
+        # read, however deep into the table it is
+        while True:
+            rows = list(
+                queryset.filter(pk__gt=last_pk).values_list(*FIELDS)[:chunk_size]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            (pks, office_lat, office_lon, in_lat, in_lon, out_lat, out_lon,
+             old_in, old_out) = zip(*rows)
+
+            new_in = _stored(calculate_distances(office_lat, office_lon, in_lat, in_lon))
+            new_out = _stored(calculate_distances(office_lat, office_lon, out_lat, out_lon))
+
+            stale = [
+                Attendance(pk=pk, check_in_distance=check_in, check_out_distance=check_out)
+                for pk, check_in, check_out, was_in, was_out
+                in zip(pks, new_in, new_out, old_in, old_out)
+                if check_in != was_in or check_out != was_out
+            ]
+            if stale and not options['dry_run']:
+                with transaction.atomic():
+                    Attendance.objects.bulk_update(
+                        stale, ['check_in_distance', 'check_out_distance']
+                    )
+
+            scanned += len(rows)
+            changed += len(stale)
+            if options['verbosity'] >= 2:
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"{scanned} records scanned, {changed} changed "
+                    f"({scanned / elapsed:.0f} rows/sec)"
+                )
+
+        elapsed = time.perf_counter() - start
+        rate = scanned / elapsed if elapsed else 0
+        verb = "would change" if options['dry_run'] else "updated"
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {scanned} records in {elapsed:.1f}s ({rate:.0f} rows/sec), "
+            f"{verb} {changed}"
+        ))
@@ -1,6 +1,10 @@
 import math
 from datetime import timedelta
 
+import numpy as np
+
+EARTH_RADIUS_METERS = 6371000
+
 
 def calculate_distance(lat1, lon1, lat2, lon2):
     """
@@ -25,12 +29,37 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     c = 2 * math.asin(math.sqrt(a))
     
     # Radius of earth in meters
-    radius = 6371000
+    radius = EARTH_RADIUS_METERS
     
     distance = c * radius
     return round(distance, 2)
 
 
+def calculate_distances(lat1, lon1, lat2, lon2):
+    """
+    Vectorized calculate_distance for many pairs of points at once.
+    Takes sequences or arrays in decimal degrees (scalars are broadcast, so
+    one office can be compared with many locations) and returns a float
+    array of distances in meters, rounded like calculate_distance.
+    Where calculate_distance would return None (a coordinate is missing
+    or zero) the result is NaN.
+    """
+    coords = np.broadcast_arrays(*(np.asarray(value, dtype=float)
+                                   for value in (lat1, lon1, lat2, lon2)))
+    missing = np.zeros(coords[0].shape, dtype=bool)
+    for value in coords:
+        missing |= np.isnan(value) | (value == 0)
+
+    lat1_rad, lon1_rad, lat2_rad, lon2_rad = (np.radians(value) for value in coords)
+    dlat = lat2_rad - lat1_rad
+    dlon = lon2_rad - lon1_rad
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon / 2) ** 2
+    c = 2 * np.arcsin(np.sqrt(a))
+
+    return np.where(missing, np.nan, np.round(c * EARTH_RADIUS_METERS, 2))
+
+
 def is_within_distance(distance_meters, allowed_distance_meters=500):
     """
     Check if the distance is within allowed distance
@@ -0,0 +1,96 @@
+"""Randomised round trips through every maze file format.
+
+Run from the maze-solver-game directory:
+
+    python -m benchmarks.check_files --trials 300 --seed 3
+
+Small random mazes, with terrain and extra start and goal markers, are
+written as .txt, .maze and .tiles files (the last with tiny tiles so the
+maze spans many) and read back every way each format can be read: loaded,
+memory-mapped and streamed. Every copy must hold the same cells, the same
+markers in the same order and the same fingerprint as the original.
+
+The first mismatch stops the run with the trial and seed to reproduce it.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.check_incremental import open_cells
+from benchmarks.check_solvers import random_maze
+from maze import mazefile
+from maze.grid import content_hash
+from maze.tiles import TiledGrid, save_tiles
+
+
+# Scatter further markers over open cells
+def add_markers(grid, rnd):
+    cells = open_cells(grid)
+    for symbol in 'SG':
+        for _ in range(rnd.randint(0, 3) if cells else 0):
+            r, c = rnd.choice(cells)
+            grid.set_cell(r, c, symbol)
+
+
+# Every way back from disk, each a (name, opener) pair
+def copies(grid, tmp, rnd):
+    txt, bin_, tiles = (os.path.join(tmp, 'maze' + ext)
+                        for ext in ('.txt', '.maze', '.tiles'))
+    mazefile.write(grid, txt)
+    mazefile.write(grid, bin_)
+    save_tiles(grid, tiles, tile=rnd.choice([2, 3, 4, 8, 256]))
+    return [('txt', lambda: mazefile.read(txt)),
+            ('maze', lambda: mazefile.read(bin_)),
+            ('mapped', lambda: mazefile.read(bin_, mapped=True)),
+            ('tiles', lambda: TiledGrid(tiles, max_tiles=rnd.choice([1, 64])))]
+
+
+def same_maze(copy, grid):
+    if (copy.rows, copy.cols) != (grid.rows, grid.cols):
+        return f"{copy.rows}x{copy.cols}, saved {grid.rows}x{grid.cols}"
+    if not np.array_equal(copy.cells, grid.cells):
+        return "cells differ"
+    if (copy.starts, copy.goals) != (grid.starts, grid.goals):
+        return f"markers {copy.starts} {copy.goals}, saved {grid.starts} {grid.goals}"
+    if bytes(copy.passable[i] for i in range(len(copy.passable))) != bytes(grid.passable):
+        return "passability differs"
+    if content_hash(copy) != grid.fingerprint:
+        return "fingerprint differs"
+    return None
+
+
+def check(rnd, seed):
+    grid = random_maze(rnd, seed)
+    add_markers(grid, rnd)
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, opener in copies(grid, tmp, rnd):
+            with opener() as copy:
+                problem = same_maze(copy, grid)
+            if problem:
+                return f"{name}: {problem}"
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trials', type=int, default=200,
+                        help="random mazes")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    t = time.perf_counter()
+    for trial in range(args.trials):
+        seed = args.seed * args.trials + trial
+        problem = check(random.Random(seed), seed)
+        if problem:
+            raise SystemExit(f"trial {trial} (--seed {args.seed}): {problem}")
+    print(f"{args.trials} mazes x 4 round trips ok "
+          f"in {time.perf_counter() - t:.1f} s", flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Headless checks of the game's input handling.
+
+Run from the maze-solver-game directory:
+
+    python -m benchmarks.check_game
+
+Each check posts input events, runs maze_game.main() (on the built-in maze
+unless told otherwise) with SDL's dummy video driver until a QUIT posted
+after them, and looks at the maze and the recorded session afterwards:
+
+  wheel   scrolling the mouse wheel, which pygame also reports as presses
+          of buttons 4 and 5, zooms without editing the maze or logging
+          a toggle
+  click   a left-click still toggles the wall under the cursor
+  default small editable mazes default to D* Lite, larger ones to BFS
+
+The first failure stops the run.
+"""
+import argparse
+import os
+import tempfile
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+import maze_game
+from maze.replay import read_log
+
+# Window pixel over the open cell (0, 1) of the built-in maze
+CURSOR = (maze_game.CELL * 3 // 2, maze_game.CELL // 2)
+
+
+# Run the game over the given events; returns its maze, the recorded
+# game options and the actions recorded
+def play(events, *argv):
+    grids = []
+    load = maze_game.load_grid
+
+    def capture(args):
+        grids.append(load(args))
+        return grids[-1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, 'session.log')
+        maze_game.load_grid = capture
+        try:
+            pygame.init()
+            for event in events + [pygame.event.Event(pygame.QUIT)]:
+                pygame.event.post(event)
+            maze_game.main(['--record', log, '--seed', '0', *argv])
+        finally:
+            maze_game.load_grid = load
+        spec, actions = read_log(log)
+    return grids[0], spec, [action for _, action, _ in actions]
+
+
+def check_wheel():
+    events = []
+    for y, button in ((1, 4), (-1, 5)):
+        events.append(pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=y))
+        events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN,
+                                         pos=CURSOR, button=button))
+    grid, _, actions = play(events)
+    if grid.version != 0:
+        return f"wheel edited the maze (version {grid.version})"
+    if 'toggle' in actions:
+        return "wheel logged a toggle"
+    return None
+
+
+def check_click():
+    grid, _, actions = play([pygame.event.Event(pygame.MOUSEBUTTONDOWN,
+                                                pos=CURSOR, button=1)])
+    if grid.version != 1 or not grid.is_wall(0, 1):
+        return "left-click did not toggle the wall under the cursor"
+    if actions.count('toggle') != 1:
+        return f"left-click logged {actions.count('toggle')} toggles"
+    return None
+
+
+def check_default():
+    for argv, expected in (((), maze_game.ALGORITHM),
+                           (('--generate', 'dfs', '--rows', '301', '--cols', '301'),
+                            maze_game.LARGE_ALGORITHM)):
+        _, spec, _ = play([], *argv)
+        if spec['algorithm'] != expected:
+            return f"{' '.join(argv) or 'built-in maze'} solved by {spec['algorithm']}"
+    return None
+
+
+CHECKS = {'wheel': check_wheel, 'click': check_click, 'default': check_default}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', nargs='+', choices=sorted(CHECKS), default=list(CHECKS))
+    args = parser.parse_args(argv)
+
+    for name in args.only:
+        problem = CHECKS[name]()
+        if problem:
+            raise SystemExit(f"{name}: {problem}")
+        print(f"{name:>10}  ok", flush=True)
+
+
+if __name__ == '__main__':
+    main()
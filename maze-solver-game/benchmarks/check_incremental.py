@@ -0,0 +1,225 @@
+"""Randomised checks of incremental repairs against from-scratch results.
+
+Run from the maze-solver-game directory:
+
+    python -m benchmarks.check_incremental --trials 300 --seed 3
+    python -m benchmarks.check_incremental --only dstar --trials 2000
+
+Small random mazes get random wall edits. After every batch:
+
+  components  the index repaired by update() (Components._open/_close)
+              splits the open cells the same way as a fresh labelling,
+              with the same sizes, and agrees with BFS on reachability
+  dstar       the repaired D* Lite plan, as the start moves along it,
+              is a valid path as short as BFS's, or missing exactly
+              when BFS finds none
+  hpa         the graph repaired by update() equals a fresh HPAGraph,
+              and its paths are valid and found exactly when BFS finds one
+  fingerprint the content hash kept by set_cell equals a fresh
+              content_hash(), including after edits another thread made
+              while the first hash was being computed
+  cache       edits made partway through a step-wise search never leave
+              its path cached for the edited maze: solve() afterwards
+              still returns a valid path as short as BFS's
+
+The first mismatch stops the run with the trial and seed to reproduce it.
+"""
+import argparse
+import random
+import threading
+import time
+
+import numpy as np
+
+from maze.cache import SolutionCache
+from maze.components import Components
+from maze.dstar import DStarLite
+from maze.generate import generate
+from maze.grid import Grid, content_hash
+from maze.hpa import HPAGraph
+from maze.search import steps
+from maze.solver import bfs, solve
+
+CHECKS = ['components', 'dstar', 'hpa', 'fingerprint', 'cache']
+
+
+def random_maze(rnd, seed, low=2, high=30):
+    rows, cols = rnd.randint(low, high), rnd.randint(low, high)
+    if rnd.random() < 0.5:
+        return generate('dfs', max(rows, 3) | 1, max(cols, 3) | 1, seed)
+    return generate('obstacles', rows, cols, seed,
+                    density=rnd.choice([0.1, 0.3, 0.5]))
+
+
+def toggle(grid, rnd, keep=()):
+    r, c = rnd.randrange(grid.rows), rnd.randrange(grid.cols)
+    if (r, c) not in keep:
+        grid.set_cell(r, c, '0' if grid.is_wall(r, c) else '1')
+
+
+def open_cells(grid):
+    return [grid.cell_pos(cell) for cell in range(grid.rows*grid.cols)
+            if grid.passable[cell]]
+
+
+# A path runs from a to b in unit steps over open cells
+def valid_path(grid, path, a, b):
+    if path[0] != a or path[-1] != b:
+        return False
+    return all(abs(r0 - r1) + abs(c0 - c1) == 1 and not grid.is_wall(r1, c1)
+               for (r0, c0), (r1, c1) in zip(path, path[1:]))
+
+
+# Same partition of the open cells as a fresh index, label for label
+def same_components(index, grid):
+    fresh = Components(grid)
+    ours = np.frombuffer(index.labels, dtype=np.int32)
+    theirs = np.frombuffer(fresh.labels, dtype=np.int32)
+    if not ((ours < 0) == (theirs < 0)).all():
+        return "walls disagree"
+    pairs = set(zip(ours[ours >= 0].tolist(), theirs[theirs >= 0].tolist()))
+    if len({a for a, _ in pairs}) != len(pairs) or len({b for _, b in pairs}) != len(pairs):
+        return "components split differently"
+    labels, counts = np.unique(ours[ours >= 0], return_counts=True)
+    if dict(zip(labels.tolist(), counts.tolist())) != index.sizes:
+        return "component sizes out of date"
+    return None
+
+
+def check_components(rnd, seed, edits):
+    grid = random_maze(rnd, seed)
+    index = Components(grid)
+    for _ in range(edits):
+        for _ in range(rnd.randint(1, 4)):
+            toggle(grid, rnd)
+        index.update()
+        problem = same_components(index, grid)
+        if problem:
+            return problem
+        cells = open_cells(grid)
+        if len(cells) >= 2:
+            a, b = rnd.choice(cells), rnd.choice(cells)
+            if index.reachable(a, b) != bool(bfs(grid, a, b)):
+                return f"reachable{a, b} disagrees with BFS"
+    return None
+
+
+def check_dstar(rnd, seed, edits):
+    grid = random_maze(rnd, seed, high=16)
+    cells = open_cells(grid)
+    if len(cells) < 2:
+        return None
+    start, goal = rnd.sample(cells, 2)
+    planner = DStarLite(grid, start, goal)
+    for _ in range(edits):
+        path, expected = planner.replan(start), bfs(grid, start, goal)
+        if len(path) != len(expected):
+            return f"path of {len(path)} cells from {start}, BFS {len(expected)}"
+        if path and not valid_path(grid, path, start, goal):
+            return f"invalid path from {start}"
+        if len(path) > 1 and rnd.random() < 0.5:
+            start = path[1]
+        else:
+            toggle(grid, rnd, keep=(start, goal))
+    return None
+
+
+def check_hpa(rnd, seed, edits):
+    grid = random_maze(rnd, seed, high=40)
+    cluster = rnd.choice([2, 3, 4, 8])
+    graph = HPAGraph(grid, cluster)
+    for _ in range(edits):
+        for _ in range(rnd.randint(1, 5)):
+            toggle(grid, rnd)
+        graph.update()
+        fresh = HPAGraph(grid, cluster)
+        if (graph.links, graph.inter, graph.intra) != (fresh.links, fresh.inter, fresh.intra):
+            return f"repaired graph differs from a fresh one (cluster {cluster})"
+        cells = open_cells(grid)
+        for _ in range(3 if cells else 0):
+            a, b = rnd.choice(cells), rnd.choice(cells)
+            path = graph.find_path(a, b)
+            if bool(path) != bool(bfs(grid, a, b)):
+                return f"path {a} -> {b} found by one of HPA*/BFS only"
+            if path and not valid_path(grid, path, a, b):
+                return f"invalid path {a} -> {b}"
+    return None
+
+
+# Grid that runs pause() once, right after content_hash reads its first
+# band of cells, so edits can land partway through the first hash
+class PausingGrid(Grid):
+    pause = None
+
+    def codes_window(self, r0, r1, c0, c1):
+        codes = super().codes_window(r0, r1, c0, c1).copy()
+        if self.pause is not None:
+            pause, self.pause = self.pause, None
+            pause()
+        return codes
+
+
+def check_fingerprint(rnd, seed, edits):
+    grid = PausingGrid(random_maze(rnd, seed).cells)
+    editor = threading.Thread(target=lambda: [toggle(grid, rnd) for _ in range(edits)])
+    # Give the editor a moment; it must wait for the hash to finish
+    grid.pause = lambda: (editor.start(), editor.join(0.01))
+    grid.fingerprint
+    editor.join()
+    if grid.fingerprint != content_hash(grid):
+        return "fingerprint misses edits made while it was first computed"
+    for _ in range(edits):
+        toggle(grid, rnd)
+        if grid.fingerprint != content_hash(grid):
+            return "fingerprint out of date after an edit"
+    return None
+
+
+def check_cache(rnd, seed, edits):
+    grid = random_maze(rnd, seed)
+    cache = SolutionCache()
+    for _ in range(edits):
+        cells = open_cells(grid)
+        if len(cells) < 2:
+            return None
+        a, b = rnd.sample(cells, 2)
+        algorithm = rnd.choice(['bfs', 'astar'])
+        search = steps(grid, a, b, algorithm, batch=rnd.randint(1, 8), cache=cache)
+        for _ in range(rnd.randint(0, 3)):
+            next(search, None)
+        toggle(grid, rnd, keep=(a, b))
+        for _ in search:
+            pass
+        path, expected = solve(grid, a, b, algorithm, cache=cache), bfs(grid, a, b)
+        if len(path) != len(expected):
+            return f"path {a} -> {b} of {len(path)} cells after an edit, BFS {len(expected)}"
+        if path and not valid_path(grid, path, a, b):
+            return f"path {a} -> {b} runs through a wall added during its search"
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', nargs='+', choices=CHECKS, default=CHECKS)
+    parser.add_argument('--trials', type=int, default=200,
+                        help="random mazes per check")
+    parser.add_argument('--edits', type=int, default=20,
+                        help="edit batches per maze")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    checks = {'components': check_components, 'dstar': check_dstar, 'hpa': check_hpa,
+              'fingerprint': check_fingerprint, 'cache': check_cache}
+    for name in args.only:
+        t = time.perf_counter()
+        for trial in range(args.trials):
+            seed = args.seed * args.trials + trial
+            problem = checks[name](random.Random(seed), seed, args.edits)
+            if problem:
+                raise SystemExit(f"{name}: trial {trial} (--seed {args.seed}): {problem}")
+        print(f"{name:>11}  {args.trials} mazes x {args.edits} edit batches ok "
+              f"in {time.perf_counter() - t:.1f} s", flush=True)
+
+
+if __name__ == '__main__':
+    main()
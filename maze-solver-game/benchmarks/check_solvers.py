@@ -0,0 +1,146 @@
+"""Randomised checks of every solver against BFS.
+
+Run from the maze-solver-game directory:
+
+    python -m benchmarks.check_solvers --trials 300 --seed 3
+    python -m benchmarks.check_solvers --only weighted --trials 2000
+
+Small random mazes from every generator get random start and goal cells:
+
+  exact     each exact solver returns a valid path as short as BFS's, or
+            no path exactly when BFS finds none
+  hpa       HPA* paths are valid, found exactly when BFS finds one, and
+            never shorter than BFS's
+  weighted  dijkstra and dial return valid paths of the same cost, no
+            dearer than BFS's path over the same terrain
+  external  external BFS over a tiled copy with tiny tiles, so paths
+            cross many tile borders, matches BFS's length
+
+The first mismatch stops the run with the trial and seed to reproduce it.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.check_incremental import open_cells, valid_path
+from maze.external import external_bfs
+from maze.generate import GENERATORS, generate
+from maze.hpa import HPAGraph
+from maze.solver import SOLVERS, bfs
+from maze.tiles import TiledGrid, save_tiles
+from maze.weighted import path_cost
+
+CHECKS = ['exact', 'hpa', 'weighted', 'external']
+EXACT = ['bidirectional', 'astar', 'wavefront', 'dstar', 'jps', 'junctions']
+PAIRS = 5                   # start and goal pairs per maze
+
+
+def random_maze(rnd, seed, low=2, high=40):
+    rows, cols = rnd.randint(low, high), rnd.randint(low, high)
+    algorithm = rnd.choice(sorted(GENERATORS))
+    if algorithm in ('obstacles', 'terrain'):
+        return generate(algorithm, rows, cols, seed,
+                        density=rnd.choice([0.0, 0.1, 0.3, 0.5]))
+    return generate(algorithm, max(rows, 3) | 1, max(cols, 3) | 1, seed)
+
+
+# Start and goal pairs over the open cells, including the maze's markers
+def queries(grid, rnd):
+    cells = open_cells(grid)
+    pairs = [(grid.start, grid.goal)] if grid.start and grid.goal else []
+    for _ in range(PAIRS if cells else 0):
+        pairs.append((rnd.choice(cells), rnd.choice(cells)))
+    return pairs
+
+
+def same_length(grid, path, expected, a, b):
+    if len(path) != len(expected):
+        return f"path {a} -> {b} of {len(path)} cells, BFS {len(expected)}"
+    if path and not valid_path(grid, path, a, b):
+        return f"invalid path {a} -> {b}"
+    return None
+
+
+def check_exact(rnd, seed):
+    grid = random_maze(rnd, seed)
+    for a, b in queries(grid, rnd):
+        expected = bfs(grid, a, b)
+        for name in EXACT:
+            problem = same_length(grid, SOLVERS[name](grid, a, b), expected, a, b)
+            if problem:
+                return f"{name}: {problem}"
+    return None
+
+
+def check_hpa(rnd, seed):
+    grid = random_maze(rnd, seed, high=60)
+    graph = HPAGraph(grid, rnd.choice([2, 3, 4, 8, 16]))
+    for a, b in queries(grid, rnd):
+        path, expected = graph.find_path(a, b), bfs(grid, a, b)
+        if bool(path) != bool(expected):
+            return f"path {a} -> {b} found by one of HPA*/BFS only"
+        if path and not valid_path(grid, path, a, b):
+            return f"invalid path {a} -> {b}"
+        if len(path) < len(expected):
+            return f"path {a} -> {b} of {len(path)} cells, shorter than BFS {len(expected)}"
+    return None
+
+
+def check_weighted(rnd, seed):
+    grid = random_maze(rnd, seed)
+    for a, b in queries(grid, rnd):
+        expected = bfs(grid, a, b)
+        costs = []
+        for name in ('dijkstra', 'dial'):
+            path = SOLVERS[name](grid, a, b)
+            if bool(path) != bool(expected):
+                return f"{name}: path {a} -> {b} found by one of it/BFS only"
+            if path and not valid_path(grid, path, a, b):
+                return f"{name}: invalid path {a} -> {b}"
+            costs.append(path_cost(grid, path))
+        if costs[0] != costs[1]:
+            return f"path {a} -> {b} costs {costs[0]} by dijkstra, {costs[1]} by dial"
+        if costs[0] > path_cost(grid, expected):
+            return f"path {a} -> {b} costs {costs[0]}, BFS's only {path_cost(grid, expected)}"
+    return None
+
+
+def check_external(rnd, seed):
+    grid = random_maze(rnd, seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'maze.tiles')
+        save_tiles(grid, path, tile=rnd.choice([2, 3, 4, 8]))
+        with TiledGrid(path, max_tiles=rnd.choice([1, 64])) as tiled:
+            for a, b in queries(grid, rnd):
+                problem = same_length(grid, external_bfs(tiled, a, b, workdir=tmp),
+                                      bfs(grid, a, b), a, b)
+                if problem:
+                    return problem
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', nargs='+', choices=CHECKS, default=CHECKS)
+    parser.add_argument('--trials', type=int, default=200,
+                        help="random mazes per check")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    checks = {'exact': check_exact, 'hpa': check_hpa,
+              'weighted': check_weighted, 'external': check_external}
+    for name in args.only:
+        t = time.perf_counter()
+        for trial in range(args.trials):
+            seed = args.seed * args.trials + trial
+            problem = checks[name](random.Random(seed), seed)
+            if problem:
+                raise SystemExit(f"{name}: trial {trial} (--seed {args.seed}): {problem}")
+        print(f"{name:>10}  {args.trials} mazes x {PAIRS + 1} queries ok "
+              f"in {time.perf_counter() - t:.1f} s", flush=True)
+
+
+if __name__ == '__main__':
+    main()
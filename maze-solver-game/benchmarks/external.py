@@ -0,0 +1,85 @@
+"""External-memory BFS over tiled mazes larger than memory.
+
+Run from the maze-solver-game directory:
+
+    python -m benchmarks.external --sizes 1e6 1e7 1e8 --max-tiles 256
+    python -m benchmarks.external --sizes 1e9 --keep big.tiles --no-solve
+
+Each size is an open field with walls at --density, generated tile by tile
+into a temporary file (or --keep FILE, reused if it exists). The solve
+reports wall time, cells expanded per second and tiles read from disk;
+mazes up to --compare cells are also solved with in-memory BFS to check
+the path length.
+"""
+import argparse
+import math
+import os
+import tempfile
+import time
+
+from maze.grid import Grid
+from maze.solver import bfs
+from maze.external import external_bfs
+from maze.tiles import MAX_TILES, TILE, TiledGrid, save_obstacles
+
+SIZES = [1e6, 1e7]
+COMPARE = 10**7
+
+
+def run(path, side, args):
+    if not os.path.exists(path):
+        t = time.perf_counter()
+        save_obstacles(path, side, side, args.seed, args.density, args.tile)
+        print(f"  generated {side}x{side} in {time.perf_counter() - t:.1f} s, "
+              f"{os.path.getsize(path) / 2**20:.0f} MiB", flush=True)
+    if args.no_solve:
+        return
+
+    with TiledGrid(path, args.max_tiles) as grid:
+        stats = {}
+        t = time.perf_counter()
+        path_cells = external_bfs(grid, grid.start, grid.goal, stats)
+        elapsed = time.perf_counter() - t
+        print(f"{side*side:>11} {elapsed:9.1f} {stats['expanded'] / elapsed:>12.0f} "
+              f"{stats['tiles_read']:>10} {stats['frontier_peak']:>9} "
+              f"{len(path_cells):>8}", flush=True)
+
+        if side*side <= args.compare:
+            memory = Grid(grid.cells)
+            expected = len(bfs(memory, memory.start, memory.goal))
+            if expected != len(path_cells):
+                raise SystemExit(f"path lengths differ at {side}x{side}: "
+                                 f"external {len(path_cells)}, bfs {expected}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=float, nargs='+', default=SIZES,
+                        help="approximate cell counts")
+    parser.add_argument('--density', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tile', type=int, default=TILE)
+    parser.add_argument('--max-tiles', type=int, default=MAX_TILES,
+                        help="tiles kept in memory per store")
+    parser.add_argument('--compare', type=float, default=COMPARE,
+                        help="check against in-memory BFS up to this many cells")
+    parser.add_argument('--keep', metavar='FILE',
+                        help="generate into FILE (one size only) and keep it")
+    parser.add_argument('--no-solve', action='store_true')
+    args = parser.parse_args(argv)
+    if args.keep and len(args.sizes) != 1:
+        parser.error("--keep takes a single size")
+
+    print(f"{'cells':>11} {'seconds':>9} {'expanded/s':>12} {'tiles read':>10} "
+          f"{'frontier':>9} {'path':>8}")
+    for size in args.sizes:
+        side = max(3, round(math.sqrt(size)))
+        if args.keep:
+            run(args.keep, side, args)
+            continue
+        with tempfile.TemporaryDirectory() as tmp:
+            run(os.path.join(tmp, 'maze.tiles'), side, args)
+
+
+if __name__ == '__main__':
+    main()
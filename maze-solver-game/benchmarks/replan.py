@@ -0,0 +1,77 @@
+"""Per-edit cost of D* Lite repairs against from-scratch solves.
+
+Run from the maze-solver-game directory:
+
+    python -m benchmarks.replan --size 300 --edits 200
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from maze import Grid
+from maze.dstar import DStarLite, dstar
+from maze.solver import bfs
+
+
+def random_grid(size, density, seed):
+    rng = np.random.default_rng(seed)
+    cells = (rng.random((size, size)) < density).astype(np.uint8)
+    cells[0, 0], cells[-1, -1] = 2, 3
+    return Grid(cells)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=200)
+    parser.add_argument('--density', type=float, default=0.25)
+    parser.add_argument('--edits', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    grid = random_grid(args.size, args.density, args.seed)
+    start, goal = grid.start, grid.goal
+    rnd = random.Random(args.seed)
+
+    planner = DStarLite(grid, start, goal)
+    t = time.perf_counter()
+    path = planner.replan(start)
+    initial = time.perf_counter() - t
+
+    repair = scratch_bfs = scratch_dstar = 0.0
+    n = 0
+    for _ in range(args.edits):
+        # Edit next to the current path so every repair has work to do
+        r, c = rnd.choice(path[1:-1]) if len(path) > 2 else (1, 1)
+        r = min(max(r + rnd.randint(-2, 2), 0), grid.rows - 1)
+        c = min(max(c + rnd.randint(-2, 2), 0), grid.cols - 1)
+        if (r, c) in (start, goal):
+            continue
+        grid.set_cell(r, c, '0' if grid.is_wall(r, c) else '1')
+        n += 1
+
+        t = time.perf_counter()
+        path = planner.replan(start)
+        repair += time.perf_counter() - t
+
+        t = time.perf_counter()
+        assert len(bfs(grid, start, goal)) == len(path)
+        scratch_bfs += time.perf_counter() - t
+
+        t = time.perf_counter()
+        dstar(grid, start, goal)
+        scratch_dstar += time.perf_counter() - t
+
+    # Edits that would have covered the start or goal were skipped
+    print(f"grid {args.size}x{args.size}, density {args.density}, "
+          f"{n} of {args.edits} edits applied")
+    n = max(n, 1)
+    print(f"initial D* Lite plan   {initial*1e3:9.2f} ms")
+    print(f"D* Lite repair / edit  {repair/n*1e3:9.2f} ms")
+    print(f"BFS from scratch       {scratch_bfs/n*1e3:9.2f} ms")
+    print(f"D* Lite from scratch   {scratch_dstar/n*1e3:9.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
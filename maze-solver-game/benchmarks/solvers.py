@@ -0,0 +1,183 @@
+"""Benchmark every solver over a sweep of maze sizes, generators and densities.
+
+Run from the maze-solver-game directory:
+
+    python -m benchmarks.solvers --json results.json --csv results.csv
+    python -m benchmarks.solvers --sizes 1e2 1e4 1e6 1e7 --algorithms bfs wavefront
+    python -m benchmarks.solvers --json new.json --compare old.json
+
+Each run records wall time (best of --repeat), peak traced memory, nodes
+expanded and path length per (maze, algorithm), then each solver's node
+expansions relative to BFS on the same maze. JSON results carry the git
+commit so runs from different commits can be compared with --compare.
+"""
+import argparse
+import csv
+import json
+import math
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+
+from maze import hpa, junctions
+from maze.generate import GENERATORS, generate
+from maze.solver import SOLVERS
+
+SIZES = [1e2, 1e3, 1e4, 1e5, 1e6]
+DENSITIES = [0.0, 0.1, 0.3]
+
+# Largest nominal size (--sizes) each solver is run on unless --no-limits
+# is given; the incremental planner is not meant for one-shot solves of
+# huge grids, HPA* pays for building its abstract graph on every run, and
+# the external BFS writes the maze out to tiles before searching it
+LIMITS = {'dstar': 10**5, 'hpa': 10**6, 'external': 10**6}
+
+FIELDS = ['generator', 'density', 'rows', 'cols', 'cells', 'algorithm', 'seed',
+          'time_s', 'peak_mb', 'expanded', 'path_length']
+
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Mazes with the nominal size they were made for; odd sides round it up
+def mazes(sizes, generators, densities, seed):
+    for size in sizes:
+        side = max(3, round(math.sqrt(size))) | 1
+        for name in generators:
+            if name == 'obstacles':
+                for density in densities:
+                    yield size, name, density, generate(name, side, side, seed,
+                                                        density=density)
+            else:
+                yield size, name, None, generate(name, side, side, seed)
+
+
+# Graphs solvers keep per grid are dropped before every run, so repeats
+# time the same work as the first solve instead of just the query
+def forget(grid):
+    hpa.forget(grid)
+    junctions.forget(grid)
+
+
+def run_one(grid, algorithm, repeat, memory):
+    start, goal = grid.start, grid.goal
+    stats = {}
+    best = math.inf
+    for _ in range(repeat):
+        forget(grid)
+        t = time.perf_counter()
+        path = SOLVERS[algorithm](grid, start, goal, stats)
+        best = min(best, time.perf_counter() - t)
+
+    peak = None
+    if memory:
+        forget(grid)
+        tracemalloc.start()
+        SOLVERS[algorithm](grid, start, goal)
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    return best, peak, stats.get('expanded'), len(path)
+
+
+# Nodes expanded by each solver relative to BFS on the same maze, e.g. the
+# pruning JPS gets on open fields
+def expansion_summary(results):
+    base = {(r['generator'], r['density'], r['cells']): r['expanded']
+            for r in results if r['algorithm'] == 'bfs'}
+    lines = []
+    for r in results:
+        bfs = base.get((r['generator'], r['density'], r['cells']))
+        if r['algorithm'] == 'bfs' or not bfs or r['expanded'] is None:
+            continue
+        lines.append(f"{r['generator']:>9} {str(r['density']):>5} {r['cells']:>9} "
+                     f"{r['algorithm']:>13}  {r['expanded'] / bfs:7.2%} of bfs")
+    if lines:
+        print("\nnodes expanded vs bfs")
+        print('\n'.join(lines))
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def key(r):
+        return (r['generator'], r['density'], r['cells'], r['algorithm'], r['seed'])
+
+    old = {key(r): r for r in baseline['results']}
+    print(f"\nvs {baseline_path} (commit {baseline['meta'].get('commit')})")
+    for r in results:
+        b = old.get(key(r))
+        if b is None or not b['time_s']:
+            continue
+        ratio = r['time_s'] / b['time_s']
+        flag = '  REGRESSION' if ratio > 1.2 else ''
+        print(f"{r['generator']:>9} {str(r['density']):>5} {r['cells']:>9} "
+              f"{r['algorithm']:>13}  x{ratio:5.2f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=float, nargs='+', default=SIZES,
+                        help="approximate cell counts")
+    parser.add_argument('--generators', nargs='+', choices=sorted(GENERATORS),
+                        default=['dfs', 'obstacles'])
+    parser.add_argument('--densities', type=float, nargs='+', default=DENSITIES)
+    parser.add_argument('--algorithms', nargs='+', choices=sorted(SOLVERS),
+                        default=sorted(SOLVERS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true',
+                        help="skip the extra tracemalloc pass")
+    parser.add_argument('--no-limits', action='store_true')
+    parser.add_argument('--json')
+    parser.add_argument('--csv')
+    parser.add_argument('--compare', metavar='BASELINE_JSON')
+    args = parser.parse_args(argv)
+
+    results = []
+    for size, name, density, grid in mazes(args.sizes, args.generators,
+                                            args.densities, args.seed):
+        for algorithm in args.algorithms:
+            if not args.no_limits and size > LIMITS.get(algorithm, math.inf):
+                continue
+            t, peak, expanded, length = run_one(grid, algorithm, args.repeat,
+                                                not args.no_memory)
+            row = dict(generator=name, density=density, rows=grid.rows,
+                       cols=grid.cols, cells=grid.rows*grid.cols,
+                       algorithm=algorithm, seed=args.seed, time_s=t,
+                       peak_mb=peak, expanded=expanded, path_length=length)
+            results.append(row)
+            mem = f"{peak:8.1f} MB" if peak is not None else ''
+            print(f"{name:>9} {str(density):>5} {row['cells']:>9} {algorithm:>13} "
+                  f"{t*1e3:10.2f} ms {mem} expanded={expanded} path={length}",
+                  flush=True)
+
+    expansion_summary(results)
+
+    meta = dict(commit=git_commit(), python=platform.python_version(),
+                numpy=np.__version__, machine=platform.machine(),
+                repeat=args.repeat)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=1)
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Dial's bucket-queue solver against a heapq Dijkstra on weighted terrain.
+
+Run from the maze-solver-game directory:
+
+    python -m benchmarks.weighted --sizes 1e4 1e5 1e6
+"""
+import argparse
+import math
+import time
+
+from maze.generate import generate
+from maze.weighted import dial, dijkstra, path_cost
+
+SIZES = [1e4, 1e5, 1e6]
+
+
+def timed(solver, grid, repeat):
+    stats = {}
+    best = math.inf
+    for _ in range(repeat):
+        t = time.perf_counter()
+        path = solver(grid, grid.start, grid.goal, stats)
+        best = min(best, time.perf_counter() - t)
+    return best, stats['expanded'], path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=float, nargs='+', default=SIZES,
+                        help="approximate cell counts")
+    parser.add_argument('--density', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'cells':>9} {'dijkstra ms':>12} {'dial ms':>10} {'speedup':>8} "
+          f"{'expanded':>9} {'cost':>8}")
+    for size in args.sizes:
+        side = max(3, round(math.sqrt(size)))
+        grid = generate('terrain', side, side, args.seed, density=args.density)
+
+        heap_t, heap_expanded, heap_path = timed(dijkstra, grid, args.repeat)
+        dial_t, dial_expanded, dial_path = timed(dial, grid, args.repeat)
+
+        cost = path_cost(grid, dial_path)
+        if cost != path_cost(grid, heap_path):
+            raise SystemExit(f"path costs differ at {side}x{side}: "
+                             f"dial {cost}, dijkstra {path_cost(grid, heap_path)}")
+        print(f"{side*side:>9} {heap_t*1e3:12.1f} {dial_t*1e3:10.1f} "
+              f"{heap_t / dial_t:7.2f}x {dial_expanded:>9} {cost:>8}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+from .cache import SolutionCache
+from .components import Components, reachable
+from .distance import DistanceCache
+from .grid import Grid, MOVES
+from .solver import SOLVERS, solve
+from .search import Step, steps
+from .state import DIRECTIONS, GameState
+from .wavefront import descend, distance_field
+
+__all__ = ['Grid', 'MOVES', 'SOLVERS', 'solve', 'DIRECTIONS', 'GameState',
+           'DistanceCache', 'descend', 'distance_field', 'Step', 'steps',
+           'Components', 'reachable', 'SolutionCache']
@@ -0,0 +1,71 @@
+import numpy as np
+
+from .distance import DistanceCache
+from .grid import MOVES
+from .wavefront import descend
+
+# Many agents heading for their nearest goal. All of them read the same
+# multi-source distance field, one BFS from every goal at once, instead of
+# running a search each. A step moves every agent one cell downhill with
+# array operations, so thousands of agents cost a few NumPy calls per tick.
+
+
+class Agents:
+    def __init__(self, grid, positions, goals, distances=None):
+        self.grid = grid
+        self.goals = tuple(goals)
+        self.pos = np.array(positions, dtype=np.intp).reshape(-1, 2)
+        self.distances = distances if distances is not None else DistanceCache()
+
+    def __len__(self):
+        return len(self.pos)
+
+    def field(self):
+        return self.distances.field(self.grid, self.goals)
+
+    # Distance of every agent to its nearest goal, -1 if none is reachable
+    def remaining(self):
+        return self.field()[self.pos[:, 0], self.pos[:, 1]]
+
+    # Move every agent that can one cell closer to its nearest goal, taking
+    # the first downhill neighbour in MOVES order like descend() does.
+    # Returns how many agents moved.
+    def step(self):
+        dist = self.field()
+        rows, cols = dist.shape
+        r, c = self.pos[:, 0], self.pos[:, 1]
+        d = dist[r, c]
+        todo = d > 0
+        moved = np.zeros(len(self.pos), dtype=bool)
+        new = self.pos.copy()
+
+        for dr, dc in MOVES:
+            nr, nc = r + dr, c + dc
+            ok = todo & (nr >= 0) & (nr < rows) & (nc >= 0) & (nc < cols)
+            idx = np.flatnonzero(ok)
+            ok[idx] = dist[nr[idx], nc[idx]] == d[idx] - 1
+            new[ok, 0], new[ok, 1] = nr[ok], nc[ok]
+            moved |= ok
+            todo &= ~ok
+
+        self.pos = new
+        return int(moved.sum())
+
+    @property
+    def arrived(self):
+        return int((self.remaining() == 0).sum())
+
+    # Full cell paths to the nearest goal, all from the one shared field
+    def paths(self):
+        dist = self.field()
+        return [descend(dist, pos) for pos in map(tuple, self.pos.tolist())]
+
+
+# Up to count distinct open cells chosen at random, skipping those in exclude
+def random_open_cells(grid, count, seed=None, exclude=()):
+    rng = np.random.default_rng(seed)
+    cells = np.flatnonzero(np.asarray(grid.open_mask).ravel())
+    if exclude:
+        cells = np.setdiff1d(cells, [grid.cell_id(pos) for pos in exclude])
+    picked = rng.choice(cells, size=min(count, cells.size), replace=False)
+    return [grid.cell_pos(cell) for cell in picked.tolist()]
@@ -0,0 +1,106 @@
+"""Solve every maze file in a directory on a process pool.
+
+    python -m maze.batch mazes/ --algorithm bfs --workers 8 > results.jsonl
+
+Files are listed lazily and handed to the pool by name only: each worker
+opens its mazes itself (the .maze wall plane is a flat bit array, so
+there is nothing to decode in the parent and no grid is ever pickled).
+One JSON object is written per maze as results come in:
+
+    {"file": "mazes/a.maze", "rows": 501, "cols": 501, "algorithm": "bfs",
+     "path_length": 1001, "expanded": 12345, "cached": false, "time_s": 0.0123}
+
+path_length counts cells including both ends and is 0 when the goal is
+unreachable, in which case nothing is searched ("expanded": 0). Files that
+cannot be read, or whose markers lie outside the maze, produce
+{"file": ..., "error": ...}.
+A throughput summary goes to stderr.
+
+With --cache DIR, paths are kept on disk keyed by maze content, so running
+the same mazes again reads them back ("cached": true) instead of solving.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import struct
+import sys
+import time
+
+from . import mazefile
+from .cache import SolutionCache
+from .solver import SOLVERS, solve
+
+EXTENSIONS = ('.maze', '.txt', '.tiles')
+
+
+# Maze files under root, yielded as they are found
+def maze_files(root, recursive=False):
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir() and recursive:
+                yield from maze_files(entry.path, recursive)
+            elif entry.is_file() and entry.name.endswith(EXTENSIONS):
+                yield entry.path
+
+
+def solve_file(job):
+    path, algorithm, cache_dir = job
+    try:
+        grid = mazefile.read(path)
+    except (OSError, ValueError, struct.error) as e:
+        return {'file': path, 'error': str(e)}
+    with grid:
+        start, goal = grid.start, grid.goal
+        if start is None or goal is None:
+            return {'file': path, 'error': "maze has no start or goal"}
+
+        # Cached or not, every maze goes through solve(), so unreachable
+        # goals are caught before searching and stats mean the same thing
+        cache = SolutionCache(directory=cache_dir) if cache_dir else None
+        stats = {}
+        t = time.perf_counter()
+        path_cells = solve(grid, start, goal, algorithm, stats, cache)
+        elapsed = time.perf_counter() - t
+    return dict(file=path, rows=grid.rows, cols=grid.cols, algorithm=algorithm,
+                path_length=len(path_cells), expanded=stats.get('expanded'),
+                cached=stats.get('cached', False), time_s=elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory')
+    parser.add_argument('--algorithm', choices=sorted(SOLVERS), default='bfs')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="pool size (default: one per core)")
+    parser.add_argument('--chunksize', type=int, default=4,
+                        help="mazes handed to a worker at a time")
+    parser.add_argument('--recursive', action='store_true')
+    parser.add_argument('--cache', metavar='DIR',
+                        help="keep solved paths here and reuse them on later runs")
+    parser.add_argument('--output', help="write JSON Lines here instead of stdout")
+    args = parser.parse_args(argv)
+
+    jobs = ((path, args.algorithm, args.cache)
+            for path in maze_files(args.directory, args.recursive))
+    out = open(args.output, 'w') if args.output else sys.stdout
+    count = failed = 0
+    t = time.perf_counter()
+    try:
+        with multiprocessing.Pool(args.workers) as pool:
+            for result in pool.imap_unordered(solve_file, jobs, args.chunksize):
+                out.write(json.dumps(result) + '\n')
+                count += 1
+                failed += 'error' in result
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - t
+    print(f"{count} mazes ({failed} failed) in {elapsed:.2f} s, "
+          f"{count / elapsed if elapsed else 0:.1f} mazes/s "
+          f"on {args.workers} workers", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Solved paths and distance fields, keyed by the maze's content fingerprint
+# so they survive rebuilding the same maze (replays, batch runs) and come
+# back when an edit is undone. Entries are numpy arrays, paths as flat cell
+# ids, kept read-only and evicted least recently used first once their
+# total size passes the memory budget.
+#
+# With a directory, every entry is also written there as a .npy file and
+# looked up on a memory miss, so a later process can skip solving
+# altogether. Writes go through a temporary file and a rename, so workers
+# sharing a directory never see half an entry.
+
+BUDGET = 128 << 20          # bytes
+
+
+# Goal cells as a sorted tuple, however distance_field was given them
+def _cells(source):
+    return tuple(sorted({tuple(p) for p in np.asarray(source).reshape(-1, 2).tolist()}))
+
+
+class SolutionCache:
+    def __init__(self, budget=BUDGET, directory=None):
+        self.budget = budget
+        self.directory = directory
+        self.size = 0
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+        value = self._load(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        value = np.asarray(value)
+        value.flags.writeable = False
+        with self._lock:
+            self._remember(key, value)
+        self._store(key, value)
+
+    def _remember(self, key, value):
+        if value.nbytes > self.budget:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= old.nbytes
+        self._entries[key] = value
+        self.size += value.nbytes
+        while self.size > self.budget:
+            _, old = self._entries.popitem(last=False)
+            self.size -= old.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    # On-disk tier
+
+    def _file(self, key):
+        name = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        return os.path.join(self.directory, name + '.npy')
+
+    def _load(self, key):
+        if not self.directory:
+            return None
+        try:
+            value = np.load(self._file(key))
+        except (OSError, ValueError):
+            return None
+        value.flags.writeable = False
+        return value
+
+    def _store(self, key, value):
+        if not self.directory:
+            return
+        path = self._file(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.save(f, value)
+        os.replace(tmp, path)
+
+    # Paths: start and goal are part of the key, the maze is its fingerprint.
+    # A search takes its key before it starts; the key carries the grid
+    # version it was taken at, and a result is dropped if the maze was
+    # edited while it was being searched, rather than filed under a key
+    # that no longer describes what was searched.
+
+    def path_key(self, grid, start, goal, algorithm):
+        return grid.version, ('path', grid.fingerprint, algorithm,
+                              (int(start[0]), int(start[1])), (int(goal[0]), int(goal[1])))
+
+    def get_path(self, grid, key):
+        ids = self.get(key[1])
+        if ids is None:
+            return None
+        return [grid.cell_pos(cell) for cell in ids.tolist()]
+
+    def put_path(self, grid, key, path):
+        version, key = key
+        if grid.version == version:
+            ids = np.array([grid.cell_id(pos) for pos in path], dtype=np.int64)
+            self.put(key, ids)
+
+    # Distance fields grown from one goal or several, keyed the same way
+
+    def field_key(self, grid, source):
+        return grid.version, ('field', grid.fingerprint, _cells(source))
+
+    def get_field(self, key):
+        return self.get(key[1])
+
+    def put_field(self, grid, key, field):
+        version, key = key
+        if grid.version == version:
+            self.put(key, field)
+
+
+# Shared by solve(), steps() and DistanceCache unless told otherwise
+CACHE = SolutionCache()
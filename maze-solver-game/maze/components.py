@@ -0,0 +1,207 @@
+import threading
+import weakref
+from array import array
+from collections import deque
+
+import numpy as np
+
+from .grid import neighbours
+
+# Connected components of the open cells, so "can the player reach the goal"
+# is a label comparison instead of a search. Every open cell carries its
+# component's label (-1 for walls). The first labelling is a vectorised
+# union-find; after that, opening a cell merges the labels around it into
+# the largest one and placing a wall floods only the pieces it may have cut
+# off.
+
+# Indexes cached per grid, refreshed from the grid's edit log. Background
+# searches query them too, so lookups and repairs are serialised.
+_indexes = weakref.WeakKeyDictionary()
+_lock = threading.RLock()
+
+
+# Union-find roots of every cell, with hooking and pointer jumping done over
+# whole edge arrays at a time: each round hooks the larger root of every
+# edge onto the smaller one, then flattens the trees. Walls stay -1.
+def _label(grid):
+    rows, cols = grid.rows, grid.cols
+    open_ = np.asarray(grid.open_mask).ravel()
+    ids = np.arange(rows*cols, dtype=np.int32).reshape(rows, cols)
+
+    both_h = open_.reshape(rows, cols)[:, :-1] & open_.reshape(rows, cols)[:, 1:]
+    both_v = open_.reshape(rows, cols)[:-1, :] & open_.reshape(rows, cols)[1:, :]
+    a = np.concatenate([ids[:, :-1][both_h], ids[:-1, :][both_v]])
+    b = np.concatenate([ids[:, 1:][both_h], ids[1:, :][both_v]])
+    del both_h, both_v
+
+    parent = ids.ravel().copy()
+    while a.size:
+        pa, pb = parent[a], parent[b]
+        keep = pa != pb
+        a, b, pa, pb = a[keep], b[keep], pa[keep], pb[keep]
+        np.minimum.at(parent, np.maximum(pa, pb), np.minimum(pa, pb))
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+    parent[~open_] = -1
+    return parent
+
+
+class Components:
+    def __init__(self, grid):
+        self.grid = grid
+        self.version = grid.version
+
+        labels = _label(grid)
+        roots, counts = np.unique(labels[labels >= 0], return_counts=True)
+        self.labels = array('i', labels.tobytes())
+        self.sizes = dict(zip(roots.tolist(), counts.tolist()))
+        # Labels handed out after the first pass never clash with cell ids
+        self._next = grid.rows * grid.cols
+
+    def label(self, pos):
+        return self.labels[self.grid.cell_id(pos)]
+
+    def reachable(self, a, b):
+        la = self.label(a)
+        return la >= 0 and la == self.label(b)
+
+    def count(self):
+        return len(self.sizes)
+
+    # Bring the labels in line with the grid's edits since the last call.
+    # Each edit is applied against the index's own view of the walls, so a
+    # cell toggled several times is simply skipped once it matches.
+    def update(self):
+        grid = self.grid
+        changed = grid.changed_since(self.version)
+        self.version += len(changed)
+        for cell in changed:
+            is_open = bool(grid.passable[cell])
+            if is_open and self.labels[cell] < 0:
+                self._open(cell)
+            elif not is_open and self.labels[cell] >= 0:
+                self._close(cell)
+
+    def _around(self, cell):
+        labels = self.labels
+        return [n for n in neighbours(cell, self.grid.rows, self.grid.cols)
+                if labels[n] >= 0]
+
+    # Relabel the cells of component old, starting from one of them
+    def _relabel(self, seed, old, new):
+        labels = self.labels
+        rows, cols = self.grid.rows, self.grid.cols
+        labels[seed] = new
+        queue = deque([seed])
+        while queue:
+            cell = queue.popleft()
+            for n in neighbours(cell, rows, cols):
+                if labels[n] == old:
+                    labels[n] = new
+                    queue.append(n)
+
+    # A new open cell joins every component around it; the smaller ones are
+    # relabelled into the largest
+    def _open(self, cell):
+        seeds = {}
+        for n in self._around(cell):
+            seeds.setdefault(self.labels[n], n)
+
+        if not seeds:
+            label = self._next
+            self._next += 1
+            self.sizes[label] = 0
+        else:
+            label = max(seeds, key=self.sizes.__getitem__)
+            for old, seed in seeds.items():
+                if old != label:
+                    self._relabel(seed, old, label)
+                    self.sizes[label] += self.sizes.pop(old)
+
+        self.labels[cell] = label
+        self.sizes[label] += 1
+
+    # A new wall can split its component into up to four pieces. One flood
+    # per open neighbour runs in lockstep; floods that meet are merged, and
+    # a group that runs dry is a piece of its own and gets a fresh label.
+    # Once a single group is left it keeps the old label, so the cost is
+    # bounded by the size of the pieces cut off, not the whole component.
+    def _close(self, cell):
+        labels = self.labels
+        rows, cols = self.grid.rows, self.grid.cols
+        label = labels[cell]
+        labels[cell] = -1
+        self.sizes[label] -= 1
+
+        seeds = self._around(cell)
+        if not self.sizes[label]:
+            del self.sizes[label]
+        if len(seeds) < 2:
+            return
+
+        merged = list(range(len(seeds)))      # union-find over the floods
+
+        def find(i):
+            while merged[i] != i:
+                merged[i] = i = merged[merged[i]]
+            return i
+
+        owner = {s: i for i, s in enumerate(seeds)}
+        queues = {i: deque([s]) for i, s in enumerate(seeds)}
+        cells = {i: [s] for i, s in enumerate(seeds)}
+
+        while len(queues) > 1:
+            for i in list(queues):
+                if i not in queues:
+                    continue
+                queue = queues[i]
+                if not queue:
+                    # Ran dry without meeting the others: a piece of its own
+                    del queues[i]
+                    piece = cells.pop(i)
+                    new = self._next
+                    self._next += 1
+                    for c in piece:
+                        labels[c] = new
+                    self.sizes[new] = len(piece)
+                    self.sizes[label] -= len(piece)
+                    if len(queues) == 1:
+                        return
+                    continue
+
+                c = queue.popleft()
+                for n in neighbours(c, rows, cols):
+                    if labels[n] != label:
+                        continue
+                    j = owner.get(n)
+                    if j is None:
+                        owner[n] = i
+                        queue.append(n)
+                        cells[i].append(n)
+                    elif find(j) != i:
+                        # Floods met: fold the other group into this one
+                        j = find(j)
+                        merged[j] = i
+                        queue.extend(queues.pop(j))
+                        cells[i] += cells.pop(j)
+
+
+# Cached index for a grid, repaired for any edits since last use
+def components_for(grid):
+    with _lock:
+        index = _indexes.get(grid)
+        if index is None:
+            index = _indexes[grid] = Components(grid)
+        else:
+            index.update()
+        return index
+
+
+# O(1) once the index exists: are a and b open cells of the same component?
+def reachable(grid, a, b):
+    with _lock:
+        return components_for(grid).reachable(a, b)
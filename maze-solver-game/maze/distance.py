@@ -0,0 +1,38 @@
+from .cache import CACHE
+from .wavefront import descend, distance_field
+
+
+# Reverse BFS from the goal, kept until the grid or goal changes. Any cell's
+# path to the goal is then a walk down the field, O(path length). Fields
+# replaced here stay in the shared solution cache, so going back to an
+# earlier goal or undoing an edit does not search again.
+class DistanceCache:
+    def __init__(self, cache=CACHE):
+        self.cache = cache
+        self._grid = None
+        self._key = None
+        self._field = None
+
+    def field(self, grid, goal):
+        key = (grid.version, goal)
+        if grid is not self._grid or key != self._key:
+            field = None
+            if self.cache is not None:
+                cache_key = self.cache.field_key(grid, goal)
+                field = self.cache.get_field(cache_key)
+            if field is None:
+                field = distance_field(grid, goal)
+                if self.cache is not None:
+                    self.cache.put_field(grid, cache_key, field)
+            self._field = field
+            self._grid, self._key = grid, key
+        return self._field
+
+    def distance(self, grid, pos, goal):
+        return int(self.field(grid, goal)[pos])
+
+    def path(self, grid, pos, goal):
+        return descend(self.field(grid, goal), pos)
+
+    def clear(self):
+        self._grid = self._key = self._field = None
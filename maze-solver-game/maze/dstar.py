@@ -0,0 +1,138 @@
+from array import array
+from heapq import heappush, heappop
+
+from .grid import neighbours
+
+INF = 2**30
+
+
+# D* Lite (Koenig & Likhachev): searches backwards from the goal and keeps
+# g/rhs values between calls, so after wall edits or player moves only the
+# affected part of the search is repaired instead of re-solving from scratch.
+class DStarLite:
+    def __init__(self, grid, start, goal):
+        self.grid = grid
+        self.rows, self.cols = grid.rows, grid.cols
+        self.goal = grid.cell_id(goal)
+        self.start = self.last = grid.cell_id(start)
+        self.version = grid.version
+        self.km = 0
+        self.expanded = 0
+
+        n = self.rows * self.cols
+        self.g = array('i', [INF]) * n
+        self.rhs = array('i', [INF]) * n
+        self.rhs[self.goal] = 0
+        self.heap = [(self.h(self.goal), 0, self.goal)]
+
+    def dist(self, a, b):
+        ar, ac = divmod(a, self.cols)
+        br, bc = divmod(b, self.cols)
+        return abs(ar - br) + abs(ac - bc)
+
+    def h(self, cell):
+        return self.dist(cell, self.start)
+
+    def key(self, cell):
+        k = min(self.g[cell], self.rhs[cell])
+        return (k + self.h(cell) + self.km, k)
+
+    def update_vertex(self, cell):
+        g, rhs = self.g, self.rhs
+        if cell != self.goal:
+            best = INF
+            if self.grid.passable[cell]:
+                for n in neighbours(cell, self.rows, self.cols):
+                    if self.grid.passable[n] and g[n] + 1 < best:
+                        best = g[n] + 1
+            rhs[cell] = best
+        if g[cell] != rhs[cell]:
+            k1, k2 = self.key(cell)
+            heappush(self.heap, (k1, k2, cell))
+
+    # Expand until the start cell is settled, or stop after `limit`
+    # expansions; returns True once settled. Expanded cells are appended to
+    # `visited` when given, for drawing the search as it runs.
+    def compute(self, limit=None, visited=None):
+        g, rhs, heap = self.g, self.rhs, self.heap
+        start = self.start
+        count = 0
+
+        while heap:
+            k1, k2, cell = heap[0]
+            if (k1, k2) >= self.key(start) and g[start] == rhs[start]:
+                break
+            if count == limit:
+                return False
+            heappop(heap)
+            if g[cell] == rhs[cell]:
+                continue                    # stale entry
+            new = self.key(cell)
+            if (k1, k2) < new:
+                heappush(heap, (new[0], new[1], cell))
+                continue
+
+            self.expanded += 1
+            count += 1
+            if visited is not None:
+                visited.append(cell)
+            if g[cell] > rhs[cell]:
+                g[cell] = rhs[cell]
+            else:
+                g[cell] = INF
+                self.update_vertex(cell)
+            for n in neighbours(cell, self.rows, self.cols):
+                self.update_vertex(n)
+        return True
+
+    # Cells waiting in the queue, skipping entries already settled
+    def frontier(self):
+        g, rhs = self.g, self.rhs
+        return [cell for _, _, cell in self.heap if g[cell] != rhs[cell]]
+
+    # Pull in wall edits made to the grid since the last call
+    def sync(self):
+        changed = self.grid.changed_since(self.version)
+        self.version += len(changed)
+        for cell in changed:
+            self.update_vertex(cell)
+            for n in neighbours(cell, self.rows, self.cols):
+                self.update_vertex(n)
+
+    def move_start(self, start):
+        cell = self.grid.cell_id(start)
+        if cell != self.start:
+            self.km += self.dist(self.last, cell)
+            self.start = self.last = cell
+
+    # Repair the search for the current start and walls, then read the path
+    def replan(self, start):
+        self.move_start(start)
+        self.sync()
+        self.compute()
+        return self.path()
+
+    def path(self):
+        g, cols = self.g, self.cols
+        cell = self.start
+        if g[cell] >= INF:
+            return []
+
+        path = [divmod(cell, cols)]
+        while cell != self.goal:
+            cell = min(
+                (n for n in neighbours(cell, self.rows, cols)
+                 if self.grid.passable[n]),
+                key=g.__getitem__,
+            )
+            path.append(divmod(cell, cols))
+        return path
+
+
+# Stateless entry point for the solver registry: a fresh plan from scratch
+def dstar(grid, start, goal, stats=None):
+    planner = DStarLite(grid, start, goal)
+    path = planner.replan(start)
+    if stats is not None:
+        stats['expanded'] = planner.expanded
+    return path
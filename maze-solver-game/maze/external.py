@@ -0,0 +1,112 @@
+import os
+import tempfile
+
+from .grid import MOVES, WALL
+from .tiles import MAX_TILES, TileStore, TiledGrid, create, save_tiles
+
+# External-memory BFS over a tiled maze. The search is level-synchronous
+# like the classic external BFS: each layer's frontier is grouped by tile
+# and the tiles are visited in file order, so a layer reads every tile it
+# touches once however many frontier cells fall in it. What has been seen
+# is itself a tiled file next to the maze, one byte per cell naming the
+# move that reached it, so memory holds the frontier plus two LRU tile
+# caches and never a per-cell array. The path is unwound from that file.
+#
+# An in-memory maze is written out to a temporary tiled file first.
+
+SOURCE = len(MOVES) + 1     # seen-file mark of the start cell; 0 = unseen
+
+
+def external_bfs(grid, start, goal, stats=None, max_tiles=None, workdir=None):
+    if not isinstance(grid, TiledGrid):
+        with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+            path = os.path.join(tmp, 'maze.tiles')
+            save_tiles(grid, path)
+            with TiledGrid(path, max_tiles or MAX_TILES) as tiled:
+                return external_bfs(tiled, start, goal, stats, max_tiles, workdir)
+
+    maze = grid.store
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        path = os.path.join(tmp, 'seen.tiles')
+        create(path, grid.rows, grid.cols, maze.tile)
+        with TileStore(path, max_tiles or maze.max_tiles, writable=True) as seen:
+            loads = maze.loads
+            found, expanded, peak = _search(maze, seen, start, goal)
+            cells = _unwind(seen, goal) if found else []
+    if stats is not None:
+        stats.update(expanded=expanded, frontier_peak=peak,
+                     tiles_read=maze.loads - loads)
+    return cells
+
+
+def _search(maze, seen, start, goal):
+    t = maze.tile
+    down, across = maze.tiles_down, maze.tiles_across
+    edge = t * (t - 1)
+
+    def locate(pos):
+        r, c = pos
+        return (r // t) * across + c // t, (r % t) * t + c % t
+
+    src, dst = locate(start), locate(goal)
+    if maze.get(src[0])[src[1]] == WALL:
+        return False, 0, 0
+    seen.get(src[0], dirty=True)[src[1]] = SOURCE
+    frontier = {src[0]: [src[1]]}
+    expanded = peak = 0
+
+    # Reach a cell of another tile by move k, if it is open and unseen
+    def cross(index, local, k, nxt):
+        if maze.get(index)[local] != WALL:
+            marks = seen.get(index, dirty=True)
+            if not marks[local]:
+                marks[local] = k
+                nxt.setdefault(index, []).append(local)
+
+    while frontier:
+        peak = max(peak, sum(map(len, frontier.values())))
+        nxt = {}
+        for index in sorted(frontier):
+            tr, tc = divmod(index, across)
+            cells = maze.get(index)
+            marks = seen.get(index, dirty=True)
+            here = nxt.setdefault(index, [])
+            for local in frontier[index]:
+                expanded += 1
+                if index == dst[0] and local == dst[1]:
+                    return True, expanded, peak
+                lr, lc = divmod(local, t)
+                # Moves inside the tile stay on the two tiles at hand; the
+                # walls padding the last tiles stop them at the maze edge
+                for k, n, inside in ((1, local - t, lr > 0), (2, local + t, lr < t - 1),
+                                     (3, local - 1, lc > 0), (4, local + 1, lc < t - 1)):
+                    if inside:
+                        if cells[n] != WALL and not marks[n]:
+                            marks[n] = k
+                            here.append(n)
+                    elif k == 1 and tr > 0:
+                        cross(index - across, local + edge, k, nxt)
+                    elif k == 2 and tr < down - 1:
+                        cross(index + across, local - edge, k, nxt)
+                    elif k == 3 and tc > 0:
+                        cross(index - 1, local + t - 1, k, nxt)
+                    elif k == 4 and tc < across - 1:
+                        cross(index + 1, local - t + 1, k, nxt)
+        frontier = {index: cells for index, cells in nxt.items() if cells}
+    return False, expanded, peak
+
+
+# Follow the seen-file moves back from the goal
+def _unwind(seen, goal):
+    t, across = seen.tile, seen.tiles_across
+    r, c = goal
+    cells = [goal]
+    while True:
+        k = seen.get((r // t) * across + c // t)[(r % t) * t + c % t]
+        if k == SOURCE:
+            break
+        dr, dc = MOVES[k - 1]
+        r, c = r - dr, c - dc
+        cells.append((r, c))
+    cells.reverse()
+    return cells
@@ -0,0 +1,205 @@
+import random
+from array import array
+
+import numpy as np
+
+from .grid import Grid, GOAL, MUD, OPEN, ROAD, START, WATER
+
+# Perfect-maze generators work on "rooms": the odd (row, col) cells of the
+# grid. Room k = i*w + j sits at grid cell (2i+1, 2j+1) and carving an edge
+# opens the wall cell halfway between two rooms. Everything is kept in flat
+# bytearrays/int arrays so 10^7-cell mazes stay within a few tens of MB.
+
+_CHUNK = 1 << 16
+
+
+def _rooms(rows, cols):
+    h, w = (rows - 1) // 2, (cols - 1) // 2
+    if h < 1 or w < 1:
+        raise ValueError("perfect mazes need at least 3x3 cells")
+    return h, w
+
+
+# Flat grid ids of every room, row by row
+def _room_cells(rows, cols, h, w):
+    i = np.arange(h, dtype=np.int64)[:, None]
+    j = np.arange(w, dtype=np.int64)[None, :]
+    return ((2*i + 1)*cols + 2*j + 1).ravel()
+
+
+# Byte per grid cell marking rooms, padded by two rows on each side so the
+# +-2 / +-2*cols neighbour offsets never need a bounds check
+def _room_flags(rows, cols, h, w):
+    flags = np.zeros(rows*cols + 4*cols, dtype=np.uint8)
+    flags[_room_cells(rows, cols, h, w) + 2*cols] = 1
+    return bytearray(flags.tobytes())
+
+
+def _finish(cells, rows, cols, start, goal):
+    grid = np.frombuffer(cells, dtype=np.uint8).reshape(rows, cols).copy()
+    grid[start] = START
+    grid[goal] = GOAL
+    return Grid(grid)
+
+
+def _room_grid(cells, rows, cols, h, w):
+    return _finish(cells, rows, cols, (1, 1), (2*h - 1, 2*w - 1))
+
+
+# Randomised depth-first search with an explicit stack (no recursion limit)
+def dfs(rows, cols, seed=None):
+    h, w = _rooms(rows, cols)
+    rnd = random.random if seed is None else random.Random(seed).random
+    cells = bytearray(b'\x01') * (rows*cols)
+    fresh = _room_flags(rows, cols, h, w)      # unvisited rooms
+    pad, down = 2*cols, 2*cols
+
+    first = cols + 1
+    cells[first] = 0
+    fresh[first + pad] = 0
+    stack = array('i', [first])
+
+    while stack:
+        a = stack[-1]
+        options = [b for b in (a - down, a + down, a - 2, a + 2) if fresh[b + pad]]
+        if not options:
+            stack.pop()
+            continue
+
+        b = options[int(rnd() * len(options))]
+        cells[(a + b) >> 1] = 0
+        cells[b] = 0
+        fresh[b + pad] = 0
+        stack.append(b)
+
+    return _room_grid(cells, rows, cols, h, w)
+
+
+# Randomised Kruskal: shuffled edges joined through a union-find over rooms
+def kruskal(rows, cols, seed=None):
+    h, w = _rooms(rows, cols)
+    rng = np.random.default_rng(seed)
+    flat = np.ones(rows*cols, dtype=np.uint8)
+    flat[_room_cells(rows, cols, h, w)] = 0
+    cells = bytearray(flat.tobytes())
+    del flat
+
+    # Edge e = 2*k + d joins room k to its right (d=0) or lower (d=1) room
+    ks = np.arange(h*w, dtype=np.int64)
+    edges = rng.permutation(np.concatenate([
+        2*ks[(ks % w) < w - 1],
+        2*ks[ks < (h - 1)*w] + 1,
+    ]))
+    del ks
+
+    parent = array('i', range(h*w))
+
+    for start in range(0, len(edges), _CHUNK):
+        chunk = edges[start:start + _CHUNK]
+        k = chunk >> 1
+        n = k + np.where(chunk & 1, w, 1)
+        i, j = np.divmod(k, w)
+        wall = (2*i + 1)*cols + 2*j + 1 + np.where(chunk & 1, cols, 1)
+
+        for a, b, x in zip(k.tolist(), n.tolist(), wall.tolist()):
+            while parent[a] != a:
+                parent[a] = a = parent[parent[a]]
+            while parent[b] != b:
+                parent[b] = b = parent[parent[b]]
+            if a != b:
+                parent[a] = b
+                cells[x] = 0
+
+    return _room_grid(cells, rows, cols, h, w)
+
+
+# Wilson's algorithm: loop-erased random walks give a uniform spanning tree
+def wilson(rows, cols, seed=None):
+    h, w = _rooms(rows, cols)
+    rnd = random.random if seed is None else random.Random(seed).random
+    cells = bytearray(b'\x01') * (rows*cols)
+    room = _room_flags(rows, cols, h, w)
+    in_tree = bytearray(rows*cols)
+    step = {}                               # last exit taken from each room
+    pad, down = 2*cols, 2*cols
+
+    order = _room_cells(rows, cols, h, w)
+    first = int(order[int(rnd() * len(order))])
+    in_tree[first] = 1
+    cells[first] = 0
+
+    for start in range(0, len(order), _CHUNK):
+        for k in order[start:start + _CHUNK].tolist():
+            if in_tree[k]:
+                continue
+
+            # Walk until the tree is hit; overwriting exits erases loops
+            cur = k
+            while not in_tree[cur]:
+                options = [b for b in (cur - down, cur + down, cur - 2, cur + 2)
+                           if room[b + pad]]
+                nxt = options[int(rnd() * len(options))]
+                step[cur] = nxt
+                cur = nxt
+
+            cur = k
+            while not in_tree[cur]:
+                nxt = step.pop(cur)
+                cells[cur] = 0
+                cells[(cur + nxt) >> 1] = 0
+                in_tree[cur] = 1
+                cur = nxt
+            step.clear()
+
+    return _room_grid(cells, rows, cols, h, w)
+
+
+# Open field with walls scattered at the given density
+def obstacles(rows, cols, seed=None, density=0.3):
+    rng = np.random.default_rng(seed)
+    cells = np.empty((rows, cols), dtype=np.uint8)
+    for start in range(0, rows, max(1, _CHUNK // cols)):
+        stop = min(rows, start + max(1, _CHUNK // cols))
+        cells[start:stop] = rng.random((stop - start, cols)) < density
+    # Keep the corners open so start and goal are not boxed in
+    cells[:2, :2] = 0
+    cells[-2:, -2:] = 0
+    cells[0, 0] = START
+    cells[-1, -1] = GOAL
+    return Grid(cells)
+
+
+# Weighted terrain: patch x patch blocks of open ground, mud and water, a
+# lattice of roads every 4 patches, and walls scattered at the given density
+def terrain(rows, cols, seed=None, density=0.1, patch=8):
+    rng = np.random.default_rng(seed)
+    coarse = rng.choice(np.array([OPEN, MUD, WATER], dtype=np.uint8),
+                        p=[0.6, 0.25, 0.15],
+                        size=(rows // patch + 1, cols // patch + 1))
+    cells = np.empty((rows, cols), dtype=np.uint8)
+    step = max(1, _CHUNK // cols)
+    for start in range(0, rows, step):
+        stop = min(rows, start + step)
+        block = coarse[start // patch:(stop - 1) // patch + 1].repeat(patch, axis=1)[:, :cols]
+        cells[start:stop] = block.repeat(patch, axis=0)[start % patch:start % patch + stop - start]
+        cells[start:stop][rng.random((stop - start, cols)) < density] = 1
+    cells[patch // 2::4*patch, :] = ROAD
+    cells[:, patch // 2::4*patch] = ROAD
+    cells[:2, :2] = OPEN
+    cells[-2:, -2:] = OPEN
+    cells[0, 0] = START
+    cells[-1, -1] = GOAL
+    return Grid(cells)
+
+
+GENERATORS = {
+    'dfs': dfs,
+    'kruskal': kruskal,
+    'wilson': wilson,
+    'obstacles': obstacles,
+    'terrain': terrain,
+}
+
+
+def generate(algorithm, rows, cols, seed=None, **options):
+    return GENERATORS[algorithm](rows, cols, seed, **options)
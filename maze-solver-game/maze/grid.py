@@ -0,0 +1,229 @@
+import threading
+
+import numpy as np
+
+MOVES = [(-1,0),(1,0),(0,-1),(0,1)]
+
+# Cell codes stored in the uint8 grid. Road, mud and water are open
+# terrain that is cheaper or dearer to cross than a plain open cell.
+OPEN, WALL, START, GOAL, ROAD, MUD, WATER = range(7)
+
+SYMBOLS = {'0': OPEN, '1': WALL, 'S': START, 'G': GOAL,
+           'r': ROAD, 'm': MUD, 'w': WATER}
+CHARS = {code: symbol for symbol, code in SYMBOLS.items()}
+
+# Cost of stepping into a cell, by code; walls are never entered
+COSTS = np.array([2, 0, 2, 2, 1, 4, 8], dtype=np.uint8)
+MAX_COST = int(COSTS.max())
+
+# Byte -> cell code lookup for parsing text mazes
+_CODES = np.full(256, 255, dtype=np.uint8)
+for _symbol, _code in SYMBOLS.items():
+    _CODES[ord(_symbol)] = _code
+
+
+# Content hashing. A maze's fingerprint XORs a 64-bit hash of every
+# (cell id, code) pair with one of its shape, so set_cell can update it in
+# O(1) and undoing an edit gives the old value back. Start and goal markers
+# hash as open cells: they are keys of a query, not part of the maze.
+_M1, _M2 = np.uint64(0xbf58476d1ce4e5b9), np.uint64(0x94d049bb133111eb)
+_HASH_BAND = 256                # rows hashed at a time
+
+
+# splitmix64 finaliser over a uint64 array
+def _mix(x):
+    x = x ^ (x >> np.uint64(30))
+    x = x * _M1
+    x = x ^ (x >> np.uint64(27))
+    x = x * _M2
+    return x ^ (x >> np.uint64(31))
+
+
+def _cell_hashes(ids, codes):
+    codes = np.where((codes == START) | (codes == GOAL), OPEN, codes)
+    return _mix((ids.astype(np.uint64) << np.uint64(3)) | codes.astype(np.uint64))
+
+
+def cell_hash(cell, code):
+    return int(_cell_hashes(np.array([cell]), np.array([code]))[0])
+
+
+# Fingerprint of any grid, read a band of rows at a time through
+# codes_window
+def content_hash(grid):
+    rows, cols = grid.rows, grid.cols
+    h = int(_mix(np.array([rows << 32 | cols], dtype=np.uint64))[0])
+    for r0 in range(0, rows, _HASH_BAND):
+        r1 = min(rows, r0 + _HASH_BAND)
+        ids = np.arange(r0*cols, r1*cols, dtype=np.uint64)
+        codes = grid.codes_window(r0, r1, 0, cols).ravel()
+        h ^= int(np.bitwise_xor.reduce(_cell_hashes(ids, codes)))
+    return h
+
+
+# Neighbouring cell ids of a flat cell id
+def neighbours(cell, rows, cols):
+    r, c = divmod(cell, cols)
+    if r > 0:
+        yield cell - cols
+    if r < rows - 1:
+        yield cell + cols
+    if c > 0:
+        yield cell - 1
+    if c < cols - 1:
+        yield cell + 1
+
+
+# Walk parent pointers back from the goal and turn ids into (row, col)
+def rebuild(parent, goal, cols):
+    cells = []
+    cell = goal
+    while cell != -1:
+        cells.append(divmod(cell, cols))
+        cell = parent[cell]
+    cells.reverse()
+    return cells
+
+
+# Lookups every kind of grid shares. Subclasses set rows, cols, the
+# passable lookup, version, the _edits log and a _lock, and provide
+# find_all(); grids backed by a file also override close().
+class GridBase:
+    _fingerprint = None
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Content hash, computed on first use; editable grids keep it current
+    # in set_cell. A solver thread may hash while the UI thread edits, so
+    # both hold _lock: an edit must not land between the first hash and
+    # set_cell starting to update it.
+    @property
+    def fingerprint(self):
+        with self._lock:
+            if self._fingerprint is None:
+                self._fingerprint = content_hash(self)
+            return self._fingerprint
+
+    # Flat ids of cells edited after the given version
+    def changed_since(self, version):
+        return self._edits[version:]
+
+    # Find the first cell holding symbol
+    def find(self, symbol):
+        hits = self.find_all(symbol)
+        return hits[0] if hits else None
+
+    @property
+    def start(self):
+        return self.find('S')
+
+    @property
+    def goal(self):
+        return self.find('G')
+
+    @property
+    def starts(self):
+        return self.find_all('S')
+
+    @property
+    def goals(self):
+        return self.find_all('G')
+
+    def in_bounds(self, r, c):
+        return 0 <= r < self.rows and 0 <= c < self.cols
+
+    def is_wall(self, r, c):
+        return not self.passable[r*self.cols + c]
+
+    # Move validation: inside the maze and not a wall
+    def can_enter(self, r, c):
+        return self.in_bounds(r, c) and self.passable[r*self.cols + c]
+
+    def cell_id(self, pos):
+        return pos[0]*self.cols + pos[1]
+
+    def cell_pos(self, cell):
+        return divmod(cell, self.cols)
+
+
+# Rectangular maze stored as one uint8 code per cell
+class Grid(GridBase):
+    def __init__(self, cells):
+        if isinstance(cells, np.ndarray):
+            codes = np.ascontiguousarray(cells, dtype=np.uint8)
+        else:
+            rows = [''.join(row) for row in cells]
+            if len({len(row) for row in rows}) != 1:
+                raise ValueError("maze rows must all have the same length")
+            raw = np.frombuffer(''.join(rows).encode('ascii'), dtype=np.uint8)
+            codes = _CODES[raw].reshape(len(rows), len(rows[0]))
+        if codes.ndim != 2 or codes.size == 0:
+            raise ValueError("maze must be a non-empty 2D grid")
+        if (codes > WATER).any():
+            raise ValueError("maze contains unknown cell symbols")
+
+        self.cells = codes
+        self.rows, self.cols = codes.shape
+        # Bumped on every edit so derived data (distance fields...) can tell
+        # it is stale; the log lets incremental planners replay the edits
+        self.version = 0
+        self._edits = []
+        self._fingerprint = None
+        self._lock = threading.Lock()
+        self._update_masks()
+
+    # Precomputed passability: a boolean plane for vectorised code and a
+    # flat byte string indexed by cell id (row*cols + col) for scalar loops,
+    # plus the step cost of every cell for weighted solvers
+    def _update_masks(self):
+        self.open_mask = self.cells != WALL
+        self.passable = bytearray(self.open_mask.tobytes())
+        self.costs = bytearray(COSTS[self.cells].tobytes())
+
+    # Passability of the cells in rows r0:r1 and columns c0:c1
+    def open_window(self, r0, r1, c0, c1):
+        return self.open_mask[r0:r1, c0:c1]
+
+    # Cell codes of the same kind of window
+    def codes_window(self, r0, r1, c0, c1):
+        return self.cells[r0:r1, c0:c1]
+
+    # Change one cell, keeping the passability masks in sync
+    def set_cell(self, r, c, symbol):
+        code = SYMBOLS[symbol]
+        cell = r*self.cols + c
+        with self._lock:
+            if self._fingerprint is not None:
+                self._fingerprint ^= (cell_hash(cell, self.cells[r, c])
+                                      ^ cell_hash(cell, code))
+            self.cells[r, c] = code
+            self.open_mask[r, c] = code != WALL
+            self.passable[cell] = code != WALL
+            self.costs[cell] = COSTS[code]
+            self.version += 1
+            self._edits.append(cell)
+
+    @classmethod
+    def from_text(cls, text):
+        return cls([line.strip() for line in text.splitlines() if line.strip()])
+
+    def to_text(self):
+        chars = np.array([ord(CHARS[c]) for c in range(len(CHARS))], dtype=np.uint8)
+        return '\n'.join(
+            chars[row].tobytes().decode('ascii') for row in self.cells
+        ) + '\n'
+
+    def __getitem__(self, pos):
+        return CHARS[int(self.cells[pos[0], pos[1]])]
+
+    # Every cell holding symbol, in row-major order
+    def find_all(self, symbol):
+        hits = np.flatnonzero(self.cells.ravel() == SYMBOLS[symbol])
+        return [self.cell_pos(cell) for cell in hits.tolist()]
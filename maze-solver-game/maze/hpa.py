@@ -0,0 +1,344 @@
+import threading
+import weakref
+from collections import deque
+from heapq import heappush, heappop
+
+import numpy as np
+
+# Hierarchical pathfinding (HPA*, Botea et al.).
+#
+# The grid is cut into CLUSTER x CLUSTER blocks. Along every border between
+# two neighbouring blocks, each run of cells that is open on both sides
+# gets one entrance (two, at the run ends, for long runs). Entrances are the
+# nodes of a small abstract graph: an edge of cost 1 crosses each border and
+# edges inside a block carry the in-block BFS distance between its
+# entrances. Queries search the abstract graph and then refine just the
+# chosen route cell by cell. Paths are near-optimal: detours that leave a
+# block between two of its entrances are only found through other blocks.
+
+CLUSTER = 32
+LONG_RUN = 6
+BATCH = 4096            # entrances searched together when building
+
+# Abstract graphs cached per grid, refreshed from the grid's edit log
+_graphs = weakref.WeakKeyDictionary()
+_lock = threading.RLock()
+
+
+class HPAGraph:
+    def __init__(self, grid, cluster=CLUSTER):
+        self.grid = grid
+        self.size = cluster
+        self.rows_c = -(-grid.rows // cluster)
+        self.cols_c = -(-grid.cols // cluster)
+        self.version = grid.version
+
+        self.links = {}         # border key -> [(cell, cell)] entrance pairs
+        self.inter = {}         # cell -> set of cells across a border
+        self.intra = {}         # cluster -> {cell: {cell: distance}}
+
+        for i in range(self.rows_c):
+            for j in range(self.cols_c):
+                if j + 1 < self.cols_c:
+                    self._build_border(('v', i, j))
+                if i + 1 < self.rows_c:
+                    self._build_border(('h', i, j))
+        self._build_clusters(range(self.rows_c * self.cols_c))
+
+    # Geometry
+
+    def cluster_of(self, cell):
+        r, c = divmod(cell, self.grid.cols)
+        return (r // self.size) * self.cols_c + c // self.size
+
+    def bounds(self, k):
+        i, j = divmod(k, self.cols_c)
+        s = self.size
+        return (i*s, min((i + 1)*s, self.grid.rows),
+                j*s, min((j + 1)*s, self.grid.cols))
+
+    def _borders_of(self, k):
+        i, j = divmod(k, self.cols_c)
+        if j > 0:
+            yield ('v', i, j - 1)
+        if j + 1 < self.cols_c:
+            yield ('v', i, j)
+        if i > 0:
+            yield ('h', i - 1, j)
+        if i + 1 < self.rows_c:
+            yield ('h', i, j)
+
+    @staticmethod
+    def _across(key, cols_c):
+        kind, i, j = key
+        return (i*cols_c + j, i*cols_c + j + 1) if kind == 'v' \
+            else (i*cols_c + j, (i + 1)*cols_c + j)
+
+    # Entrances
+
+    def _build_border(self, key):
+        grid, s = self.grid, self.size
+        cols = grid.cols
+        open_ = grid.passable
+        kind, i, j = key
+
+        if kind == 'v':
+            c = (j + 1)*s - 1
+            r0, r1 = i*s, min((i + 1)*s, grid.rows)
+            pairs = [(r*cols + c, r*cols + c + 1) for r in range(r0, r1)]
+        else:
+            r = (i + 1)*s - 1
+            c0, c1 = j*s, min((j + 1)*s, cols)
+            pairs = [(r*cols + c, (r + 1)*cols + c) for c in range(c0, c1)]
+
+        links = []
+        run = []
+        for a, b in pairs + [(None, None)]:
+            if a is not None and open_[a] and open_[b]:
+                run.append((a, b))
+                continue
+            if len(run) >= LONG_RUN:
+                links += [run[0], run[-1]]
+            elif run:
+                links.append(run[len(run) // 2])
+            run = []
+
+        self.links[key] = links
+        for a, b in links:
+            self.inter.setdefault(a, set()).add(b)
+            self.inter.setdefault(b, set()).add(a)
+
+    def _drop_border(self, key):
+        for a, b in self.links.pop(key, ()):
+            for x, y in ((a, b), (b, a)):
+                partners = self.inter.get(x)
+                if partners is not None:
+                    partners.discard(y)
+                    if not partners:
+                        del self.inter[x]
+
+    def entrances(self, k):
+        nodes = set()
+        for key in self._borders_of(k):
+            for a, b in self.links.get(key, ()):
+                nodes.add(a if self.cluster_of(a) == k else b)
+        return nodes
+
+    # In-cluster search
+
+    # BFS from src that stays inside cluster k; returns (dist, parent) dicts
+    def cluster_bfs(self, k, src, targets=None):
+        r0, r1, c0, c1 = self.bounds(k)
+        cols = self.grid.cols
+        open_ = self.grid.passable
+        dist = {src: 0}
+        parent = {src: -1}
+        remaining = set(targets) - {src} if targets is not None else None
+        queue = deque([src])
+
+        while queue:
+            cell = queue.popleft()
+            r, c = divmod(cell, cols)
+            d = dist[cell] + 1
+            for n, ok in ((cell - cols, r > r0), (cell + cols, r < r1 - 1),
+                          (cell - 1, c > c0), (cell + 1, c < c1 - 1)):
+                if ok and n not in dist and open_[n]:
+                    dist[n] = d
+                    parent[n] = cell
+                    queue.append(n)
+                    if remaining is not None:
+                        remaining.discard(n)
+                        if not remaining:
+                            return dist, parent
+        return dist, parent
+
+    # Intra-cluster distances between entrances. Every entrance gets its own
+    # copy of its cluster's padded tile and all of them are searched at once
+    # with a NumPy frontier expansion, about BATCH entrances at a time.
+    def _build_clusters(self, clusters):
+        batch, size = [], 0
+        for k in clusters:
+            nodes = sorted(self.entrances(k))
+            self.intra[k] = {}
+            if not nodes:
+                continue
+            batch.append((k, nodes))
+            size += len(nodes)
+            if size >= BATCH:
+                self._search_batch(batch, size)
+                batch, size = [], 0
+        if batch:
+            self._search_batch(batch, size)
+
+    def _search_batch(self, batch, size):
+        width = self.size + 2
+        area = width * width
+        shifts = np.array([-width, width, -1, 1], dtype=np.intp)
+        cols = self.grid.cols
+
+        tiles = []
+        local = []
+        for k, nodes in batch:
+            r0, r1, c0, c1 = self.bounds(k)
+            tile = np.zeros((width, width), dtype=bool)
+            tile[1:1 + r1 - r0, 1:1 + c1 - c0] = self.grid.open_window(r0, r1, c0, c1)
+            tiles += [tile.ravel()] * len(nodes)
+            r, c = np.divmod(np.array(nodes, dtype=np.intp), cols)
+            local.append((r - r0 + 1)*width + c - c0 + 1)
+
+        open_ = np.concatenate(tiles)
+        dist = np.full(open_.size, -1, dtype=np.int32)
+        owner = np.empty(open_.size, dtype=np.int32)
+        frontier = np.arange(size, dtype=np.intp)*area + np.concatenate(local)
+        dist[frontier] = 0
+        d = 0
+        while frontier.size:
+            d += 1
+            nbrs = (frontier[:, None] + shifts).ravel()
+            nbrs = nbrs[open_[nbrs] & (dist[nbrs] < 0)]
+            order = np.arange(nbrs.size, dtype=np.int32)
+            owner[nbrs] = order
+            nbrs = nbrs[owner[nbrs] == order]
+            dist[nbrs] = d
+            frontier = nbrs
+
+        dist = dist.reshape(size, area)
+        first = 0
+        for (k, nodes), loc in zip(batch, local):
+            table = dist[first:first + len(nodes)][:, loc].tolist()
+            first += len(nodes)
+            self.intra[k] = {
+                a: {b: db for b, db in zip(nodes, row) if db > 0}
+                for a, row in zip(nodes, table)
+            }
+
+    def cluster_path(self, k, a, b):
+        _, parent = self.cluster_bfs(k, a, (b,))
+        if b not in parent:
+            return None
+        path = []
+        while b != -1:
+            path.append(b)
+            b = parent[b]
+        path.reverse()
+        return path
+
+    # Local rebuild after wall edits: borders of edited clusters are
+    # re-scanned, and every cluster on either side of them is re-linked
+    def update(self):
+        changed = self.grid.changed_since(self.version)
+        self.version += len(changed)
+        if not changed:
+            return
+
+        dirty = {self.cluster_of(cell) for cell in changed}
+        borders = {key for k in dirty for key in self._borders_of(k)}
+        for key in borders:
+            self._drop_border(key)
+            self._build_border(key)
+            dirty.update(self._across(key, self.cols_c))
+        self._build_clusters(dirty)
+
+    # Queries
+
+    def find_path(self, start, goal, stats=None):
+        grid = self.grid
+        cols = grid.cols
+        src, dst = grid.cell_id(start), grid.cell_id(goal)
+        ks, kg = self.cluster_of(src), self.cluster_of(dst)
+
+        # Temporary edges from the start and into the goal
+        dist_s, _ = self.cluster_bfs(ks, src)
+        out_s = {n: dist_s[n] for n in self.entrances(ks) if n in dist_s}
+        dist_g, _ = self.cluster_bfs(kg, dst)
+        into_g = {n: dist_g[n] for n in self.entrances(kg) if n in dist_g}
+
+        best_cost, route = None, None
+        if ks == kg and dst in dist_s:
+            best_cost, route = dist_s[dst], [src, dst]
+
+        # A* over entrances, Manhattan heuristic
+        gr, gc = goal
+
+        def h(cell):
+            r, c = divmod(cell, cols)
+            return abs(r - gr) + abs(c - gc)
+
+        cost = {src: 0}
+        parent = {src: -1}
+        heap = [(h(src), 0, src)]
+        expanded = 0
+
+        while heap:
+            f, g, cell = heappop(heap)
+            if best_cost is not None and f >= best_cost:
+                break
+            if g > cost.get(cell, g):
+                continue
+            expanded += 1
+
+            if cell == src:
+                succ = list(out_s.items())
+            else:
+                succ = list(self.intra[self.cluster_of(cell)].get(cell, {}).items())
+            succ += [(n, 1) for n in self.inter.get(cell, ())]
+            for n, w in succ:
+                ng = g + w
+                if ng < cost.get(n, ng + 1):
+                    cost[n] = ng
+                    parent[n] = cell
+                    heappush(heap, (ng + h(n), ng, n))
+
+            if cell in into_g:
+                total = g + into_g[cell]
+                if best_cost is None or total < best_cost:
+                    best_cost = total
+                    route = []
+                    n = cell
+                    while n != -1:
+                        route.append(n)
+                        n = parent[n]
+                    route.reverse()
+                    route.append(dst)
+
+        if stats is not None:
+            stats['expanded'] = expanded
+        if route is None:
+            return []
+        return [grid.cell_pos(cell) for cell in self.refine(route)]
+
+    # Turn a route of abstract nodes into cells
+    def refine(self, route):
+        cells = [route[0]]
+        for a, b in zip(route, route[1:]):
+            if a == b:
+                continue
+            ka, kb = self.cluster_of(a), self.cluster_of(b)
+            if ka != kb:
+                cells.append(b)                 # one step across a border
+            else:
+                cells += self.cluster_path(ka, a, b)[1:]
+        return cells
+
+
+# Cached abstract graph for a grid, repaired for any edits since last use
+def graph_for(grid, cluster=CLUSTER):
+    with _lock:
+        graph = _graphs.get(grid)
+        if graph is None or graph.size != cluster:
+            graph = _graphs[grid] = HPAGraph(grid, cluster)
+        else:
+            graph.update()
+        return graph
+
+
+# Drop the cached graph, so the next solve builds it again
+def forget(grid):
+    with _lock:
+        _graphs.pop(grid, None)
+
+
+# Queries hold the lock too, so a repair never runs under one
+def hpa(grid, start, goal, stats=None):
+    with _lock:
+        return graph_for(grid).find_path(start, goal, stats)
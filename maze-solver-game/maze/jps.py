@@ -0,0 +1,124 @@
+from array import array
+from heapq import heappush, heappop
+
+# Jump Point Search for 4-connected uniform-cost grids.
+#
+# Canonical paths go vertical first: a vertical move scans sideways at every
+# step and stops where a horizontal scan finds something, while a
+# horizontal move only stops at the goal or where it is forced to turn,
+# i.e. a cell above/below it is open but the one diagonally behind is not
+# (so no earlier vertical move could have reached it). A* then runs over
+# these jump points only, with straight segments between them.
+
+UP, DOWN, LEFT, RIGHT = (-1, 0), (1, 0), (0, -1), (0, 1)
+
+
+def jps(grid, start, goal, stats=None):
+    rows, cols = grid.rows, grid.cols
+    open_ = grid.passable
+    gr, gc = goal
+
+    def walkable(r, c):
+        return 0 <= r < rows and 0 <= c < cols and open_[r*cols + c]
+
+    def jump_h(r, c, dc):
+        while True:
+            c += dc
+            if not walkable(r, c):
+                return None
+            if r == gr and c == gc:
+                return c
+            if ((walkable(r - 1, c) and not walkable(r - 1, c - dc))
+                    or (walkable(r + 1, c) and not walkable(r + 1, c - dc))):
+                return c
+
+    def jump_v(r, c, dr):
+        while True:
+            r += dr
+            if not walkable(r, c):
+                return None
+            if (r == gr and c == gc
+                    or jump_h(r, c, 1) is not None
+                    or jump_h(r, c, -1) is not None):
+                return r
+
+    # Directions worth searching from a jump point reached moving (dr, dc)
+    def directions(r, c, move):
+        if move is None:
+            return (UP, DOWN, LEFT, RIGHT)
+        dr, dc = move
+        if dr:
+            return (move, LEFT, RIGHT)
+        out = [move]
+        for side in (UP, DOWN):
+            if walkable(r + side[0], c) and not walkable(r + side[0], c - dc):
+                out.append(side)
+        return out
+
+    src = start[0]*cols + start[1]
+    dst = gr*cols + gc
+    parent = array('i', [-1]) * (rows*cols)
+    cost = array('i', [-1]) * (rows*cols)
+    cost[src] = 0
+    # Entries: (f, -g, cell, arrival direction index or -1)
+    moves = (UP, DOWN, LEFT, RIGHT)
+    heap = [(abs(start[0]-gr) + abs(start[1]-gc), 0, src, -1)]
+    path = []
+    expanded = 0
+
+    while heap:
+        _, neg_g, cell, arrived = heappop(heap)
+        g = -neg_g
+        if g > cost[cell]:
+            continue
+        expanded += 1
+
+        if cell == dst:
+            path = _expand(parent, dst, cols)
+            break
+
+        r, c = divmod(cell, cols)
+        move = moves[arrived] if arrived >= 0 else None
+        for dr, dc in directions(r, c, move):
+            if dr:
+                jr = jump_v(r, c, dr)
+                if jr is None:
+                    continue
+                jc, dist = c, abs(jr - r)
+            else:
+                jc = jump_h(r, c, dc)
+                if jc is None:
+                    continue
+                jr, dist = r, abs(jc - c)
+
+            n = jr*cols + jc
+            ng = g + dist
+            if cost[n] == -1 or ng < cost[n]:
+                cost[n] = ng
+                parent[n] = cell
+                heappush(heap, (ng + abs(jr-gr) + abs(jc-gc), -ng,
+                                n, moves.index((dr, dc))))
+
+    if stats is not None:
+        stats['expanded'] = expanded
+    return path
+
+
+# Rebuild the cell-level path by filling in the straight runs between
+# consecutive jump points
+def _expand(parent, goal, cols):
+    points = []
+    cell = goal
+    while cell != -1:
+        points.append(divmod(cell, cols))
+        cell = parent[cell]
+    points.reverse()
+
+    path = [points[0]]
+    for (r, c), (nr, nc) in zip(points, points[1:]):
+        dr = (nr > r) - (nr < r)
+        dc = (nc > c) - (nc < c)
+        while (r, c) != (nr, nc):
+            r, c = r + dr, c + dc
+            path.append((r, c))
+    return path
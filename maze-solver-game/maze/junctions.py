@@ -0,0 +1,278 @@
+import threading
+import weakref
+from array import array
+from collections import deque
+from heapq import heappush, heappop
+
+import numpy as np
+
+from .grid import neighbours
+
+# Maze preprocessing for repeated queries.
+#
+# Dead-end filling: open cells with at most one open neighbour are filled
+# one after another until none is left, except the maze's own start and
+# goal markers. Every filled cell remembers the neighbour it was still
+# attached to, so from anywhere in a filled branch the way out is a walk
+# along those exits with no search. A perfect maze shrinks to the single
+# corridor between its markers.
+#
+# Corridor contraction: what is left (the core) is cut at junctions and
+# corridor ends, and each corridor between two of them becomes one
+# weighted edge of a junction graph. Queries run Dijkstra over that small
+# graph and then expand the corridors back into cells. Paths are exact.
+
+# Junction graphs cached per grid; any edit rebuilds on next use
+_graphs = weakref.WeakKeyDictionary()
+_lock = threading.RLock()
+
+
+# Open neighbours of every cell of a boolean plane, as a flat array
+def _degrees(mask):
+    rows, cols = mask.shape
+    padded = np.zeros((rows + 2, cols + 2), dtype=np.uint8)
+    padded[1:-1, 1:-1] = mask
+    return (padded[:-2, 1:-1] + padded[2:, 1:-1]
+            + padded[1:-1, :-2] + padded[1:-1, 2:]).ravel()
+
+
+class JunctionGraph:
+    def __init__(self, grid):
+        self.grid = grid
+        self.version = grid.version
+        n = grid.rows * grid.cols
+
+        self.filled = bytearray(n)
+        self.exit = array('i', [-1]) * n        # way out of a filled cell
+        self.is_node = bytearray(n)
+        self.edge_of = array('i', [-1]) * n     # corridor holding a core cell
+        self.offset = array('i', [0]) * n       # its index along the corridor
+        self.edges = []                         # (u, v, start in cells, length)
+        self.cells = array('i')                 # corridor interiors, u to v
+        self.adj = {}                           # node -> [(node, weight, edge)]
+
+        self._fill()
+        self._contract()
+
+    def _fill(self):
+        grid = self.grid
+        rows, cols = grid.rows, grid.cols
+        open_ = grid.passable
+        keep = {grid.cell_id(pos) for pos in grid.starts + grid.goals}
+        degree = array('i', _degrees(np.asarray(grid.open_mask)).astype(np.int32).tobytes())
+        filled, exit_ = self.filled, self.exit
+
+        tips = np.flatnonzero(np.asarray(grid.open_mask).ravel()
+                              & (np.frombuffer(degree, dtype=np.int32) <= 1))
+        queue = deque(c for c in tips.tolist() if c not in keep)
+        while queue:
+            cell = queue.popleft()
+            if filled[cell]:
+                continue
+            filled[cell] = 1
+            for n in neighbours(cell, rows, cols):
+                if open_[n] and not filled[n]:
+                    exit_[cell] = n
+                    degree[n] -= 1
+                    if degree[n] <= 1 and n not in keep:
+                        queue.append(n)
+
+    def _contract(self):
+        grid = self.grid
+        rows, cols = grid.rows, grid.cols
+        mask = (np.asarray(grid.open_mask).ravel()
+                & (np.frombuffer(self.filled, dtype=np.uint8) == 0))
+        degree = _degrees(mask.reshape(rows, cols))
+        core = bytearray(mask.tobytes())
+
+        nodes = np.flatnonzero(mask & (degree != 2)).tolist()
+        for u in nodes:
+            self.is_node[u] = 1
+        for u in nodes:
+            self._corridors(u, core)
+
+        # Loops with no junction on them get one cell promoted to a node
+        for cell in np.flatnonzero(mask & (degree == 2)).tolist():
+            if self.edge_of[cell] < 0 and not self.is_node[cell]:
+                self.is_node[cell] = 1
+                self._corridors(cell, core)
+
+    # Follow every corridor leaving node u, recording each one only once
+    def _corridors(self, u, core):
+        rows, cols = self.grid.rows, self.grid.cols
+        for first in neighbours(u, rows, cols):
+            if not core[first]:
+                continue
+            if self.is_node[first]:
+                if u < first:
+                    self._add_edge(u, first, [])
+                continue
+            if self.edge_of[first] >= 0:
+                continue
+
+            interior = []
+            prev, cur = u, first
+            while not self.is_node[cur]:
+                interior.append(cur)
+                for n in neighbours(cur, rows, cols):
+                    if core[n] and n != prev:
+                        prev, cur = cur, n
+                        break
+            self._add_edge(u, cur, interior)
+
+    def _add_edge(self, u, v, interior):
+        e = len(self.edges)
+        for i, cell in enumerate(interior):
+            self.edge_of[cell] = e
+            self.offset[cell] = i
+        self.edges.append((u, v, len(self.cells), len(interior)))
+        self.cells.extend(interior)
+        # A corridor that loops back to its own node never shortens a path
+        if u != v:
+            weight = len(interior) + 1
+            self.adj.setdefault(u, []).append((v, weight, e))
+            self.adj.setdefault(v, []).append((u, weight, e))
+
+    # Queries
+
+    # Exits from cell until the core, or until the root of a branch that
+    # was filled away completely
+    def climb(self, cell):
+        chain = [cell]
+        while self.filled[cell]:
+            cell = self.exit[cell]
+            if cell < 0:
+                break
+            chain.append(cell)
+        return chain
+
+    # Nodes a core cell can reach along its corridor:
+    # [(node, cost, cells strictly between)]
+    def attachments(self, cell):
+        if self.is_node[cell]:
+            return [(cell, 0, [])]
+        e, i = self.edge_of[cell], self.offset[cell]
+        u, v, start, length = self.edges[e]
+        interior = self.cells[start:start + length]
+        return [(u, i + 1, interior[:i][::-1].tolist()),
+                (v, length - i, interior[i + 1:].tolist())]
+
+    # Corridor cells of edge e walked away from node
+    def corridor(self, e, node):
+        u, v, start, length = self.edges[e]
+        interior = self.cells[start:start + length].tolist()
+        return interior if node == u else interior[::-1]
+
+    def find_path(self, start, goal, stats=None):
+        grid = self.grid
+        src, dst = grid.cell_id(start), grid.cell_id(goal)
+        expanded = 0
+        cells = []
+
+        if grid.passable[src] and grid.passable[dst]:
+            up, down = self.climb(src), self.climb(dst)
+            seen = {cell: i for i, cell in enumerate(up)}
+            for j, cell in enumerate(down):
+                if cell in seen:
+                    cells = up[:seen[cell] + 1] + down[:j][::-1]
+                    break
+            else:
+                a, b = up[-1], down[-1]
+                if not self.filled[a] and not self.filled[b]:
+                    core, expanded = self._core_path(a, b)
+                    if core:
+                        cells = up[:-1] + core + down[:-1][::-1]
+
+        if stats is not None:
+            stats['expanded'] = expanded
+        return [grid.cell_pos(cell) for cell in cells]
+
+    # Dijkstra over junctions between two core cells, expanded to cells
+    def _core_path(self, a, b):
+        best, route = None, None
+        # Both on one corridor: straight along it is a candidate
+        if not self.is_node[a] and self.edge_of[a] == self.edge_of[b]:
+            i, j = self.offset[a], self.offset[b]
+            _, _, start, _ = self.edges[self.edge_of[a]]
+            best = abs(j - i)
+            route = self.cells[start + min(i, j):start + max(i, j) + 1].tolist()
+            if j < i:
+                route.reverse()
+
+        targets = {}
+        for node, cost, between in self.attachments(b):
+            if node not in targets or cost < targets[node][0]:
+                targets[node] = (cost, between)
+
+        dist = {}
+        parent = {}
+        heap = []
+        for node, cost, between in self.attachments(a):
+            if cost < dist.get(node, cost + 1):
+                dist[node] = cost
+                parent[node] = (None, between)
+                heappush(heap, (cost, node))
+
+        expanded = 0
+        while heap:
+            d, node = heappop(heap)
+            if best is not None and d >= best:
+                break
+            if d > dist[node]:
+                continue
+            expanded += 1
+
+            if node in targets:
+                cost, between = targets[node]
+                if best is None or d + cost < best:
+                    best = d + cost
+                    route = self._unwind(parent, node, a) + between[::-1]
+                    if node != b:
+                        route.append(b)
+
+            for n, w, e in self.adj.get(node, ()):
+                nd = d + w
+                if nd < dist.get(n, nd + 1):
+                    dist[n] = nd
+                    parent[n] = (node, e)
+                    heappush(heap, (nd, n))
+
+        return route or [], expanded
+
+    # Cells from a up to and including node, following Dijkstra parents
+    def _unwind(self, parent, node, a):
+        hops = []
+        while True:
+            prev, via = parent[node]
+            if prev is None:
+                break
+            hops.append((prev, via, node))
+            node = prev
+
+        cells = [a] + parent[node][1]
+        if node != a:
+            cells.append(node)
+        for prev, e, nxt in reversed(hops):
+            cells += self.corridor(e, prev)
+            cells.append(nxt)
+        return cells
+
+
+# Cached junction graph for a grid, rebuilt after edits
+def graph_for(grid):
+    with _lock:
+        graph = _graphs.get(grid)
+        if graph is None or graph.version != grid.version:
+            graph = _graphs[grid] = JunctionGraph(grid)
+        return graph
+
+
+# Drop the cached graph, so the next solve builds it again
+def forget(grid):
+    with _lock:
+        _graphs.pop(grid, None)
+
+
+def junctions(grid, start, goal, stats=None):
+    with _lock:
+        return graph_for(grid).find_path(start, goal, stats)
@@ -0,0 +1,287 @@
+"""Binary maze files.
+
+Layout (little-endian), version 2:
+
+    offset  size  field
+         0     4  magic b'MAZE'
+         4     2  format version
+         6     2  flags: bit 0 set if a terrain plane follows
+         8     4  rows
+        12     4  cols
+        16     8  start row, col  (0xFFFFFFFF if absent)
+        24     8  goal row, col   (0xFFFFFFFF if absent)
+        32     -  wall plane, one bit per cell in row-major order,
+                  least significant bit first, 1 = wall
+         -     -  terrain plane (if flagged), one cell code byte per cell
+                  in row-major order, right after the wall plane
+         -     8  number of further start and goal markers, 4 bytes each
+         -     -  row, col of every further start, then of every further
+                  goal, 4 bytes each
+
+Version 1 files end after the planes and hold one start and one goal at
+most; they are still read.
+
+Files can be opened with open_mapped(), which maps the wall plane with mmap
+so only the pages a solver or renderer touches are read from disk. Mazes
+too large for that are kept as tiled .tiles files (see maze.tiles).
+
+    python -m maze.mazefile in.txt out.maze    # convert any way
+    python -m maze.mazefile in.maze out.tiles
+"""
+import mmap
+import struct
+import sys
+import threading
+
+import numpy as np
+
+from .grid import CHARS, COSTS, Grid, GridBase, GOAL, OPEN, START, WALL
+from .tiles import TiledGrid, save_tiles
+
+MAGIC = b'MAZE'
+VERSION = 2
+HEADER = struct.Struct('<4sHHIIIIII')
+MARKERS = struct.Struct('<II')
+NONE = 0xFFFFFFFF
+FLAG_TERRAIN = 1
+
+_CHUNK = 1 << 23        # cells packed per write, a multiple of 8
+
+
+def _pos(r, c):
+    return [] if r == NONE else [(r, c)]
+
+
+def _read_header(data):
+    if len(data) < HEADER.size:
+        raise ValueError("not a maze file: too short")
+    magic, version, flags, rows, cols, sr, sc, gr, gc = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a maze file: bad magic")
+    if version not in (1, VERSION):
+        raise ValueError(f"unsupported maze file version {version}")
+    size = _terrain_offset(rows, cols)
+    if flags & FLAG_TERRAIN:
+        size += rows*cols
+    if version > 1:
+        size += MARKERS.size
+    if len(data) < size:
+        raise ValueError("maze file is truncated")
+
+    starts, goals = _pos(sr, sc), _pos(gr, gc)
+    if version > 1:
+        more_starts, more_goals = MARKERS.unpack_from(data, size - MARKERS.size)
+        count = more_starts + more_goals
+        if len(data) < size + 8*count:
+            raise ValueError("maze file is truncated")
+        cells = np.frombuffer(data, dtype='<u4', count=2*count, offset=size)
+        cells = [tuple(p) for p in cells.reshape(-1, 2).tolist()]
+        starts += cells[:more_starts]
+        goals += cells[more_starts:]
+    for r, c in starts + goals:
+        if not (r < rows and c < cols):
+            raise ValueError(f"maze file marker {(r, c)} is outside the maze")
+    return rows, cols, starts, goals, flags
+
+
+def _terrain_offset(rows, cols):
+    return HEADER.size + (rows*cols + 7) // 8
+
+
+# The first start and goal go in the header and any others after the planes
+def save(grid, path):
+    starts, goals = list(grid.starts), list(grid.goals)
+    sr, sc = starts[0] if starts else (NONE, NONE)
+    gr, gc = goals[0] if goals else (NONE, NONE)
+    codes = grid.cells.ravel()
+    walls = codes == WALL
+    # Plain mazes keep the compact one-bit layout
+    flags = FLAG_TERRAIN if (codes > GOAL).any() else 0
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, flags, grid.rows, grid.cols,
+                            sr, sc, gr, gc))
+        for i in range(0, walls.size, _CHUNK):
+            f.write(np.packbits(walls[i:i + _CHUNK], bitorder='little').tobytes())
+        if flags & FLAG_TERRAIN:
+            for i in range(0, codes.size, _CHUNK):
+                f.write(codes[i:i + _CHUNK].tobytes())
+        more = starts[1:] + goals[1:]
+        f.write(MARKERS.pack(len(starts[1:]), len(goals[1:])))
+        f.write(np.array(more, dtype='<u4').reshape(-1, 2).tobytes())
+
+
+def _unpack_walls(data, rows, cols):
+    packed = np.frombuffer(data, dtype=np.uint8, count=(rows*cols + 7) // 8,
+                           offset=HEADER.size)
+    bits = np.unpackbits(packed, count=rows*cols, bitorder='little')
+    return bits.reshape(rows, cols)
+
+
+def _terrain(data, rows, cols):
+    return np.frombuffer(data, dtype=np.uint8, count=rows*cols,
+                         offset=_terrain_offset(rows, cols)).reshape(rows, cols)
+
+
+# Read a whole file into an editable Grid
+def load(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    rows, cols, starts, goals, flags = _read_header(data)
+
+    if flags & FLAG_TERRAIN:
+        cells = _terrain(data, rows, cols).copy()
+    else:
+        cells = _unpack_walls(data, rows, cols)     # 0 = open, 1 = wall
+    for pos in goals:
+        cells[pos] = GOAL
+    for pos in starts:
+        cells[pos] = START
+    return Grid(cells)
+
+
+# Passability view over the packed wall plane, indexed by cell id
+class _PackedPassable:
+    def __init__(self, buf, size):
+        self.buf = buf
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, cell):
+        return not (self.buf[HEADER.size + (cell >> 3)] >> (cell & 7)) & 1
+
+
+# Step costs by cell id: read from the terrain plane when the file has one,
+# otherwise every open cell costs the same
+class _MappedCosts:
+    def __init__(self, buf, passable, offset=None):
+        self.buf = buf
+        self.passable = passable
+        self.offset = offset
+        self.table = COSTS.tolist()
+
+    def __len__(self):
+        return len(self.passable)
+
+    def __getitem__(self, cell):
+        if self.offset is not None:
+            return self.table[self.buf[self.offset + cell]]
+        return self.table[OPEN] if self.passable[cell] else 0
+
+
+# Read-only grid backed by an mmap of a maze file. It offers the same
+# lookups as Grid; open_mask and cells decode the whole plane on first use.
+class MappedGrid(GridBase):
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.rows, self.cols, starts, goals, flags = _read_header(self._mmap)
+        self._markers = dict.fromkeys(goals, 'G')
+        self._markers.update(dict.fromkeys(starts, 'S'))
+        self.terrain = bool(flags & FLAG_TERRAIN)
+        self._terrain_at = _terrain_offset(self.rows, self.cols) if self.terrain else None
+        self.passable = _PackedPassable(self._mmap, self.rows*self.cols)
+        self.costs = _MappedCosts(self._mmap, self.passable, self._terrain_at)
+        self.version = 0
+        self._edits = []
+        self._lock = threading.Lock()
+        self._open_mask = None
+
+    def close(self):
+        self._open_mask = None
+        self.passable = self.costs = None
+        self._mmap.close()
+
+    @property
+    def open_mask(self):
+        if self._open_mask is None:
+            self._open_mask = _unpack_walls(self._mmap, self.rows, self.cols) == 0
+        return self._open_mask
+
+    # Decode just the bytes under a window, one row at a time
+    def open_window(self, r0, r1, c0, c1):
+        out = np.empty((r1 - r0, c1 - c0), dtype=bool)
+        for i, r in enumerate(range(r0, r1)):
+            first, last = r*self.cols + c0, r*self.cols + c1
+            lo, hi = HEADER.size + (first >> 3), HEADER.size + ((last + 7) >> 3)
+            bits = np.unpackbits(np.frombuffer(self._mmap[lo:hi], dtype=np.uint8),
+                                 bitorder='little')
+            skip = first & 7
+            out[i] = bits[skip:skip + c1 - c0] == 0
+        return out
+
+    def codes_window(self, r0, r1, c0, c1):
+        if self.terrain:
+            return _terrain(self._mmap, self.rows, self.cols)[r0:r1, c0:c1]
+        return np.where(self.open_window(r0, r1, c0, c1), OPEN, WALL).astype(np.uint8)
+
+    @property
+    def cells(self):
+        if self.terrain:
+            cells = _terrain(self._mmap, self.rows, self.cols).copy()
+        else:
+            cells = _unpack_walls(self._mmap, self.rows, self.cols)
+        for pos, symbol in self._markers.items():
+            cells[pos] = START if symbol == 'S' else GOAL
+        return cells
+
+    def __getitem__(self, pos):
+        if pos in self._markers:
+            return self._markers[pos]
+        cell = self.cell_id(pos)
+        if self.terrain:
+            return CHARS[self._mmap[self._terrain_at + cell]]
+        return '0' if self.passable[cell] else '1'
+
+    # Markers come from the file's marker list, in the order saved
+    def find_all(self, symbol):
+        return [pos for pos, s in self._markers.items() if s == symbol]
+
+    def set_cell(self, r, c, symbol):
+        raise TypeError("memory-mapped mazes are read-only; load() one to edit")
+
+
+def open_mapped(path):
+    return MappedGrid(path)
+
+
+# Text notation: one row per line of 'S', '0', '1', 'G'
+def read_text(path):
+    with open(path) as f:
+        return Grid.from_text(f.read())
+
+
+def write_text(grid, path):
+    with open(path, 'w') as f:
+        f.write(grid.to_text())
+
+
+# Load any format, picking by extension; tiled files are always streamed
+def read(path, mapped=False):
+    if path.endswith('.txt'):
+        return read_text(path)
+    if path.endswith('.tiles'):
+        return TiledGrid(path)
+    return open_mapped(path) if mapped else load(path)
+
+
+def write(grid, path):
+    if path.endswith('.txt'):
+        write_text(grid, path)
+    elif path.endswith('.tiles'):
+        save_tiles(grid, path)
+    else:
+        save(grid, path)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        sys.exit("usage: python -m maze.mazefile SOURCE DEST  (.txt, .maze or .tiles)")
+    write(read(argv[0]), argv[1])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+# Per-frame timing for the game loop. A FrameProfiler only exists while the
+# HUD or a trace is switched on; the loop guards every call with
+# `if prof is not None`, so a run without one pays nothing else.
+#
+#     prof.begin_frame()
+#     ...handle events...
+#     prof.mark('events')
+#     ...draw...
+#     prof.mark('draw')
+#     prof.end_frame()
+#
+# A frame is only closed when something was drawn: loop passes that just
+# handle events keep adding to the open frame, and time spent blocked
+# waiting between passes is never counted.
+#
+# Hooks are called with each finished frame record (a dict of section
+# times in ms plus 'frame', 't' and 'total') and with each solve record
+# ({'solve': stats}); TraceWriter is one that writes them to a file.
+
+WINDOW = 240            # frames kept for the percentiles
+
+
+class FrameProfiler:
+    def __init__(self, window=WINDOW):
+        self.frames = deque(maxlen=window)
+        self.hooks = []
+        self.frame = 0
+        self.solve = {}             # stats of the last finished solve
+        self._origin = time.perf_counter()
+        self._last = None
+        self._record = None
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+        return hook
+
+    def begin_frame(self):
+        self._last = time.perf_counter()
+        if self._record is None:
+            self._record = {'t': (self._last - self._origin) * 1e3}
+
+    # Charge the time since the previous mark to section
+    def mark(self, section):
+        now = time.perf_counter()
+        self._record[section] = self._record.get(section, 0.0) + (now - self._last) * 1e3
+        self._last = now
+
+    def end_frame(self):
+        record, self._record = self._record, None
+        record['total'] = sum(v for k, v in record.items() if k != 't')
+        record['frame'] = self.frame
+        self.frames.append(record['total'])
+        self.frame += 1
+        for hook in self.hooks:
+            hook(record)
+
+    def record_solve(self, stats):
+        self.solve = dict(stats)
+        for hook in self.hooks:
+            hook({'frame': self.frame, 'solve': self.solve})
+
+    # Frame time percentiles in ms over the recent window
+    def percentiles(self, q=(50, 95, 99)):
+        if not self.frames:
+            return dict.fromkeys(q, 0.0)
+        return dict(zip(q, np.percentile(self.frames, q).tolist()))
+
+    def close(self):
+        for hook in self.hooks:
+            close = getattr(hook, 'close', None)
+            if close is not None:
+                close()
+        self.hooks = []
+
+
+# Hook writing one JSON object per line
+class TraceWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w')
+
+    def __call__(self, record):
+        self.file.write(json.dumps(record) + '\n')
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,178 @@
+"""Record play sessions and replay them headless.
+
+A log is a JSON header line describing the maze and game options, then one
+line per game action, prefixed with the number of frames drawn so far:
+
+    {"version": 1, "spec": {"generate": "dfs", "rows": 501, ...}}
+    0 right
+    3 solve
+    5 solved 1001
+    9 toggle 4 7
+    12 tick
+    40 end 17 3
+
+'solved N' marks where a background search finished with an N-cell path
+and 'end R C' holds the final player cell; replay checks both. Logs whose
+name ends in .gz are compressed.
+
+    python -m maze.replay session.log.gz --repeat 3
+
+Replay drives GameState directly with no window and no frame pacing, so
+a session recorded on a large maze doubles as an end-to-end benchmark.
+"""
+import argparse
+import gzip
+import json
+import sys
+import time
+
+from . import mazefile
+from .agents import random_open_cells
+from .cache import CACHE
+from .generate import generate
+from .grid import Grid
+from .state import GameState
+
+VERSION = 1
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't')
+    return open(path, mode)
+
+
+# Rebuild a maze from a spec: a file path, maze text, or generator options,
+# plus the number of goal markers to scatter over in-memory mazes
+def build_grid(spec):
+    if spec.get('file'):
+        grid = mazefile.read(spec['file'], mapped=True)
+    elif spec.get('text'):
+        grid = Grid.from_text(spec['text'])
+    else:
+        options = {}
+        if spec.get('density') is not None and spec['generate'] in ('obstacles', 'terrain'):
+            options['density'] = spec['density']
+        grid = generate(spec['generate'], spec['rows'], spec['cols'],
+                        spec.get('seed'), **options)
+
+    # Extra goals can only be marked on mazes held in memory
+    missing = spec.get('goals', 1) - len(grid.goals)
+    if missing > 0 and isinstance(grid, Grid):
+        for r, c in random_open_cells(grid, missing, spec.get('seed'),
+                                      exclude=grid.starts + grid.goals):
+            grid.set_cell(r, c, 'G')
+    return grid
+
+
+def build_state(spec):
+    state = GameState(build_grid(spec), spec.get('algorithm'))
+    if spec.get('agents'):
+        state.spawn(spec['agents'], spec.get('seed'))
+    return state
+
+
+class Recorder:
+    def __init__(self, path, spec):
+        self.file = _open(path, 'w')
+        self.file.write(json.dumps({'version': VERSION, 'spec': spec}) + '\n')
+
+    def log(self, frame, action, *args):
+        self.file.write(' '.join(map(str, (frame, action) + args)) + '\n')
+
+    def close(self, frame, player):
+        self.log(frame, 'end', *player)
+        self.file.close()
+
+
+def read_log(path):
+    with _open(path, 'r') as f:
+        header = json.loads(f.readline())
+        if header.get('version') != VERSION:
+            raise ValueError(f"unsupported replay log version {header.get('version')}")
+        actions = []
+        for line in f:
+            frame, action, *args = line.split()
+            actions.append((int(frame), action, [int(a) for a in args]))
+    return header['spec'], actions
+
+
+# Run a log against a fresh GameState. Searches are run to completion when
+# they start and their path is applied at the 'solved' line, as the live
+# game does when the background search reports back; moves and edits in
+# between discard it. Returns a report with timings and any mismatches.
+def replay(spec, actions):
+    state = build_state(spec)
+    pending = None
+    show_hint = False
+    mismatches = []
+    frame = -1
+
+    t = time.perf_counter()
+    for at, action, args in actions:
+        if at != frame:
+            # The live loop draws, and so asks for the hint, once a frame
+            if show_hint:
+                state.hint()
+            frame = at
+
+        if action in ('up', 'down', 'left', 'right'):
+            if state.move(action):
+                pending = None
+        elif action == 'toggle':
+            if state.toggle_wall(tuple(args)):
+                pending = None
+        elif action == 'solve':
+            state.path = []
+            *_, last = state.search_steps()
+            pending = last.path
+        elif action == 'solved':
+            if pending is not None:
+                state.path = pending
+                pending = None
+                if len(state.path) != args[0]:
+                    mismatches.append(f"frame {at}: path of {len(state.path)} "
+                                      f"cells, recorded {args[0]}")
+        elif action == 'tick':
+            state.step_agents()
+        elif action == 'hint':
+            show_hint = not show_hint
+        elif action == 'end':
+            if state.player != tuple(args):
+                mismatches.append(f"frame {at}: player at {state.player}, "
+                                  f"recorded {tuple(args)}")
+        else:
+            raise ValueError(f"unknown replay action {action!r}")
+    elapsed = time.perf_counter() - t
+
+    return dict(frames=frame + 1, actions=len(actions), time_s=elapsed,
+                player=state.player, mismatches=mismatches)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('log')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--cold', action='store_true',
+                        help="empty the solution cache before every run")
+    args = parser.parse_args(argv)
+
+    spec, actions = read_log(args.log)
+    failed = False
+    for _ in range(args.repeat):
+        if args.cold:
+            CACHE.clear()
+        report = replay(spec, actions)
+        rate = report['actions'] / report['time_s'] if report['time_s'] else 0
+        print(f"{report['actions']} actions over {report['frames']} frames in "
+              f"{report['time_s']*1e3:.1f} ms ({rate:.0f} actions/s), "
+              f"player at {report['player']}")
+        for line in report['mismatches']:
+            print(f"  MISMATCH {line}")
+        failed = failed or bool(report['mismatches'])
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+import time
+from array import array
+from collections import deque, namedtuple
+from contextlib import nullcontext
+from heapq import heappush, heappop
+
+from .cache import CACHE
+from .dstar import DStarLite
+from .grid import neighbours, rebuild
+from .solver import direct, solve
+
+# One slice of a running search: cells expanded since the previous step,
+# the current frontier, and the path once the search is over (None before).
+# The final step may carry solver stats: 'expanded', 'frontier_peak' (the
+# largest frontier seen at a step boundary, so sampling costs nothing per
+# expansion) and 'time_s' (wall time, including any time the consumer held
+# the search).
+Step = namedtuple('Step', 'visited frontier path stats', defaults=(None,))
+
+BATCH = 512
+
+
+# BFS that yields a Step every `batch` expansions
+def bfs_steps(grid, start, goal, batch=BATCH):
+    rows, cols = grid.rows, grid.cols
+    open_ = grid.passable
+    src = start[0]*cols + start[1]
+    dst = goal[0]*cols + goal[1]
+
+    t0 = time.perf_counter()
+    parent = array('i', [-1]) * (rows*cols)
+    seen = bytearray(rows*cols)
+    seen[src] = 1
+    queue = deque([src])
+    visited = []
+    expanded = peak = 0
+
+    while queue:
+        cell = queue.popleft()
+        visited.append(divmod(cell, cols))
+        expanded += 1
+
+        if cell == dst:
+            yield Step(visited, [], rebuild(parent, dst, cols),
+                       _stats(expanded, max(peak, len(queue)), t0))
+            return
+
+        for n in neighbours(cell, rows, cols):
+            if open_[n] and not seen[n]:
+                seen[n] = 1
+                parent[n] = cell
+                queue.append(n)
+
+        if len(visited) >= batch:
+            peak = max(peak, len(queue))
+            yield Step(visited, [divmod(c, cols) for c in queue], None)
+            visited = []
+
+    yield Step(visited, [], [], _stats(expanded, peak, t0))
+
+
+# A* (Manhattan heuristic) that yields a Step every `batch` expansions
+def astar_steps(grid, start, goal, batch=BATCH):
+    rows, cols = grid.rows, grid.cols
+    open_ = grid.passable
+    src = start[0]*cols + start[1]
+    dst = goal[0]*cols + goal[1]
+    gr, gc = goal
+
+    t0 = time.perf_counter()
+    parent = array('i', [-1]) * (rows*cols)
+    cost = array('i', [-1]) * (rows*cols)
+    cost[src] = 0
+    heap = [(abs(start[0]-gr) + abs(start[1]-gc), 0, src)]
+    visited = []
+    expanded = peak = 0
+
+    while heap:
+        _, neg_g, cell = heappop(heap)
+        g = -neg_g
+        if g > cost[cell]:
+            continue
+        visited.append(divmod(cell, cols))
+        expanded += 1
+
+        if cell == dst:
+            yield Step(visited, [], rebuild(parent, dst, cols),
+                       _stats(expanded, max(peak, len(heap)), t0))
+            return
+
+        for n in neighbours(cell, rows, cols):
+            if not open_[n]:
+                continue
+            ng = g + 1
+            if cost[n] == -1 or ng < cost[n]:
+                cost[n] = ng
+                parent[n] = cell
+                r, c = divmod(n, cols)
+                heappush(heap, (ng + abs(r-gr) + abs(c-gc), -ng, n))
+
+        if len(visited) >= batch:
+            peak = max(peak, len(heap))
+            yield Step(visited, [divmod(e[2], cols) for e in heap], None)
+            visited = []
+
+    yield Step(visited, [], [], _stats(expanded, peak, t0))
+
+
+# D* Lite that yields a Step every `batch` expansions. A planner kept
+# between searches is repaired instead of planning afresh; with a lock,
+# each batch holds it, so other users of the planner run between batches.
+def dstar_steps(grid, start, goal, batch=BATCH, planner=None, lock=None):
+    lock = lock or nullcontext()
+    cols = grid.cols
+    t0 = time.perf_counter()
+    with lock:
+        if planner is None:
+            planner = DStarLite(grid, start, goal)
+        planner.move_start(start)
+        planner.sync()
+        before = planner.expanded
+    peak = 0
+
+    while True:
+        cells = []
+        with lock:
+            done = planner.compute(batch, cells)
+            peak = max(peak, len(planner.heap))
+            path = planner.path() if done else None
+            frontier = [] if done else planner.frontier()
+        visited = [divmod(c, cols) for c in cells]
+        if done:
+            yield Step(visited, [], path, _stats(planner.expanded - before, peak, t0))
+            return
+        yield Step(visited, [divmod(c, cols) for c in frontier], None)
+
+
+STEPPERS = {
+    'bfs': bfs_steps,
+    'astar': astar_steps,
+    'dstar': dstar_steps,
+}
+
+
+def _stats(expanded, peak, t0):
+    return {'expanded': expanded, 'frontier_peak': peak,
+            'time_s': time.perf_counter() - t0}
+
+
+# Step-wise search; algorithms without a stepper yield one final Step
+def steps(grid, start, goal, algorithm='bfs', batch=BATCH, cache=CACHE):
+    # Cache keys hash the whole maze, which grids paged in from disk skip
+    if direct(grid, algorithm):
+        cache = None
+    path = None
+    if algorithm in STEPPERS and cache is not None:
+        key = cache.path_key(grid, start, goal, algorithm)
+        path = cache.get_path(grid, key)
+    if path is not None:
+        yield Step([], [], path, dict(expanded=0, cached=True, time_s=0.0))
+    elif algorithm in STEPPERS:
+        for step in STEPPERS[algorithm](grid, start, goal, batch):
+            if step.path is not None and cache is not None:
+                cache.put_path(grid, key, step.path)
+            yield step
+    else:
+        stats = {}
+        t0 = time.perf_counter()
+        path = solve(grid, start, goal, algorithm, stats, cache)
+        stats['time_s'] = time.perf_counter() - t0
+        yield Step([], [], path, stats)
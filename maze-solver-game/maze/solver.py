@@ -0,0 +1,203 @@
+from array import array
+from collections import deque
+from heapq import heappush, heappop
+
+from .cache import CACHE
+from .components import reachable
+from .dstar import dstar
+from .external import external_bfs
+from .grid import Grid, neighbours, rebuild
+from .hpa import hpa
+from .jps import jps
+from .junctions import junctions
+from .wavefront import wavefront
+from .weighted import dial, dijkstra
+
+
+# Breadth-first search with a parent array instead of per-entry path copies
+def bfs(grid, start, goal, stats=None):
+    rows, cols = grid.rows, grid.cols
+    open_ = grid.passable
+    src = start[0]*cols + start[1]
+    dst = goal[0]*cols + goal[1]
+
+    parent = array('i', [-1]) * (rows*cols)
+    seen = bytearray(rows*cols)
+    seen[src] = 1
+    queue = deque([src])
+    path = []
+    expanded = 0
+
+    while queue:
+        cell = queue.popleft()
+        expanded += 1
+
+        if cell == dst:
+            path = rebuild(parent, dst, cols)
+            break
+
+        for n in neighbours(cell, rows, cols):
+            if open_[n] and not seen[n]:
+                seen[n] = 1
+                parent[n] = cell
+                queue.append(n)
+
+    if stats is not None:
+        stats['expanded'] = expanded
+    return path
+
+
+# Bidirectional BFS: grow one layer at a time from whichever side is smaller
+def bidirectional(grid, start, goal, stats=None):
+    rows, cols = grid.rows, grid.cols
+    open_ = grid.passable
+    src = start[0]*cols + start[1]
+    dst = goal[0]*cols + goal[1]
+
+    if src == dst:
+        if stats is not None:
+            stats['expanded'] = 0
+        return [start]
+
+    fwd = array('i', [-1]) * (rows*cols)    # parent towards start
+    bwd = array('i', [-1]) * (rows*cols)    # parent towards goal
+    depth = array('i', [0]) * (rows*cols)   # distance from the side that reached it
+    side = bytearray(rows*cols)             # 1 = reached from start, 2 = from goal
+    side[src], side[dst] = 1, 2
+    front_a, front_b = [src], [dst]
+    path = []
+    expanded = 0
+
+    while front_a and front_b:
+        if len(front_a) <= len(front_b):
+            mark, parent, front = 1, fwd, front_a
+        else:
+            mark, parent, front = 2, bwd, front_b
+
+        best = None
+        nxt = []
+        expanded += len(front)
+        for cell in front:
+            for n in neighbours(cell, rows, cols):
+                if not open_[n] or side[n] == mark:
+                    continue
+                if side[n]:
+                    # Frontiers touch; finish the layer to keep the shortest meeting
+                    length = depth[cell] + depth[n]
+                    if best is None or length < best[0]:
+                        best = (length, cell, n) if mark == 1 else (length, n, cell)
+                    continue
+                side[n] = mark
+                depth[n] = depth[cell] + 1
+                parent[n] = cell
+                nxt.append(n)
+
+        if best:
+            _, a, b = best
+            path = rebuild(fwd, a, cols)
+            while b != -1:
+                path.append(divmod(b, cols))
+                b = bwd[b]
+            break
+
+        if mark == 1:
+            front_a = nxt
+        else:
+            front_b = nxt
+
+    if stats is not None:
+        stats['expanded'] = expanded
+    return path
+
+
+# A* with the Manhattan distance heuristic
+def astar(grid, start, goal, stats=None):
+    rows, cols = grid.rows, grid.cols
+    open_ = grid.passable
+    src = start[0]*cols + start[1]
+    dst = goal[0]*cols + goal[1]
+    gr, gc = goal
+
+    parent = array('i', [-1]) * (rows*cols)
+    cost = array('i', [-1]) * (rows*cols)
+    cost[src] = 0
+    # Ties on f are broken towards the deeper entry so open areas don't fan out
+    heap = [(abs(start[0]-gr) + abs(start[1]-gc), 0, src)]
+    path = []
+    expanded = 0
+
+    while heap:
+        _, neg_g, cell = heappop(heap)
+        g = -neg_g
+
+        if g > cost[cell]:
+            continue
+        expanded += 1
+        if cell == dst:
+            path = rebuild(parent, dst, cols)
+            break
+
+        for n in neighbours(cell, rows, cols):
+            if not open_[n]:
+                continue
+            ng = g + 1
+            if cost[n] == -1 or ng < cost[n]:
+                cost[n] = ng
+                parent[n] = cell
+                r, c = divmod(n, cols)
+                heappush(heap, (ng + abs(r-gr) + abs(c-gc), -ng, n))
+
+    if stats is not None:
+        stats['expanded'] = expanded
+    return path
+
+
+SOLVERS = {
+    'bfs': bfs,
+    'bidirectional': bidirectional,
+    'astar': astar,
+    'wavefront': wavefront,
+    'dstar': dstar,
+    'jps': jps,
+    'hpa': hpa,
+    'junctions': junctions,
+    'dijkstra': dijkstra,
+    'dial': dial,
+    'external': external_bfs,
+}
+
+# Solvers that stream the maze from disk. The connectivity index and the
+# content fingerprint would each read the whole maze first, so solve()
+# runs these directly, as it does any solver on a grid paged in from disk
+# (memory-mapped or tiled), where a short query should only read the pages
+# it touches.
+STREAMING = {'external'}
+
+
+def direct(grid, algorithm):
+    return algorithm in STREAMING or not isinstance(grid, Grid)
+
+
+# stats, if given, receives solver counters such as 'expanded'. On grids
+# held in memory a goal walled off from the start is caught by the
+# connectivity index before any search runs, and a maze already solved for
+# this start and goal is served from cache (stats['cached'] set, nothing
+# expanded); pass cache=None to always search.
+def solve(grid, start, goal, algorithm='bfs', stats=None, cache=CACHE):
+    if direct(grid, algorithm):
+        return SOLVERS[algorithm](grid, start, goal, stats)
+    if not reachable(grid, start, goal):
+        if stats is not None:
+            stats['expanded'] = 0
+        return []
+    if cache is not None:
+        key = cache.path_key(grid, start, goal, algorithm)
+        path = cache.get_path(grid, key)
+        if path is not None:
+            if stats is not None:
+                stats.update(expanded=0, cached=True)
+            return path
+    path = SOLVERS[algorithm](grid, start, goal, stats)
+    if cache is not None:
+        cache.put_path(grid, key, path)
+    return path
@@ -0,0 +1,141 @@
+import threading
+import time
+
+from .agents import Agents, random_open_cells
+from .components import reachable
+from .distance import DistanceCache
+from .dstar import DStarLite
+from .search import Step, dstar_steps, steps
+from .solver import direct, solve
+
+DIRECTIONS = {
+    'up': (-1, 0),
+    'down': (1, 0),
+    'left': (0, -1),
+    'right': (0, 1),
+}
+
+
+# Player position, goals and current solution on top of a Grid.
+# The player stands on the first start marker and every other start marker
+# holds an agent. With no algorithm given, paths come from a cached
+# distance field grown from all goals at once, which the agents share;
+# single-target algorithms aim for the first goal, and 'dstar' keeps an
+# incremental planner that is repaired between solves.
+class GameState:
+    def __init__(self, grid, algorithm=None):
+        self.grid = grid
+        self.algorithm = algorithm
+        starts = grid.starts
+        self.player = starts[0] if starts else None
+        self.goals = tuple(grid.goals)
+        self.goal = self.goals[0] if self.goals else None
+        self.path = []
+        # Set when a move or edit left the path on show out of date and it
+        # has to be solved again; the caller does that off the UI thread
+        self.stale = False
+        self.distances = DistanceCache()
+        self.agents = Agents(grid, starts[1:], self.goals, self.distances)
+        self.planner = None
+        # Background searches may replan while the game thread moves
+        self._planner_lock = threading.Lock()
+        self._hint_key = self._hint = None
+
+    # Step the player one cell; returns True if the move was allowed. A D*
+    # Lite path on show follows the player: it is marked stale, and the
+    # repair runs in the caller's background search.
+    def move(self, direction):
+        dx, dy = DIRECTIONS[direction]
+        nx, ny = self.player[0] + dx, self.player[1] + dy
+
+        if self.grid.can_enter(nx, ny):
+            self.player = (nx, ny)
+            if self.planner is not None and self.path:
+                self.stale = True
+            return True
+        return False
+
+    # Flip a cell between wall and open; the player and goal cells are fixed.
+    # A path on show is marked stale. Even D* Lite can have to re-expand
+    # much of the maze after one edit, so its repair, like any other
+    # search, is left to search_steps() off the UI thread.
+    def toggle_wall(self, pos):
+        r, c = pos
+        if not self.grid.in_bounds(r, c) or pos == self.player or pos in self.goals:
+            return False
+
+        self.grid.set_cell(r, c, '0' if self.grid.is_wall(r, c) else '1')
+        if self.path:
+            self.stale = True
+        return True
+
+    def solve(self):
+        self.stale = False
+        if self.algorithm is None:
+            self.path = self.hint()
+        elif not direct(self.grid, self.algorithm) and not self.reachable():
+            self.path = []
+        elif self.algorithm == 'dstar':
+            self.path = self.replan()
+        else:
+            self.path = solve(self.grid, self.player, self.goal, self.algorithm)
+        return self.path
+
+    def replan(self):
+        with self._planner_lock:
+            if self.planner is None:
+                self.planner = DStarLite(self.grid, self.player, self.goal)
+            return self.planner.replan(self.player)
+
+    # Step-wise version of solve() for background searches; the caller
+    # applies the final Step's path to self.path
+    def search_steps(self):
+        self.stale = False
+        return self._search_steps()
+
+    def _search_steps(self):
+        t0 = time.perf_counter()
+        if self.algorithm is None:
+            path = self.hint()
+            yield Step([], [], path, {'time_s': time.perf_counter() - t0})
+        elif not direct(self.grid, self.algorithm) and not self.reachable():
+            yield Step([], [], [], {'expanded': 0, 'time_s': time.perf_counter() - t0})
+        elif self.algorithm == 'dstar':
+            with self._planner_lock:
+                if self.planner is None:
+                    self.planner = DStarLite(self.grid, self.player, self.goal)
+            yield from dstar_steps(self.grid, self.player, self.goal,
+                                   planner=self.planner, lock=self._planner_lock)
+        else:
+            yield from steps(self.grid, self.player, self.goal, self.algorithm)
+
+    # Path from the current player cell to the nearest goal, cheap to call
+    # per frame: the same list is returned until the player or walls change
+    def hint(self):
+        key = (self.player, self.grid.version)
+        if key != self._hint_key:
+            self._hint = (self.distances.path(self.grid, self.player, self.goals)
+                          if self.reachable(self.goals) else [])
+            self._hint_key = key
+        return self._hint
+
+    # O(1) per goal against the grid's connectivity index; by default only
+    # the first goal, which single-target algorithms aim for, is checked
+    def reachable(self, goals=None):
+        goals = (self.goal,) if goals is None else goals
+        return any(reachable(self.grid, self.player, g) for g in goals)
+
+    # Add count agents on random open cells
+    def spawn(self, count, seed=None):
+        taken = [self.player, *self.goals, *map(tuple, self.agents.pos.tolist())]
+        cells = random_open_cells(self.grid, count, seed, exclude=taken)
+        self.agents = Agents(self.grid, self.agents.pos.tolist() + cells,
+                             self.goals, self.distances)
+
+    # Advance every agent one cell towards its nearest goal
+    def step_agents(self):
+        return self.agents.step()
+
+    @property
+    def won(self):
+        return self.player in self.goals
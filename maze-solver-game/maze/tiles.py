@@ -0,0 +1,309 @@
+"""Tiled maze files, for mazes too large to hold in memory.
+
+Layout (little-endian), version 2:
+
+    offset  size  field
+         0     4  magic b'MAZT'
+         4     2  format version
+         6     2  tile side in cells
+         8     8  rows
+        16     8  cols
+        24    16  start row, col  (-1 if absent)
+        40    16  goal row, col   (-1 if absent)
+        56     -  tiles in row-major tile order, each tile*tile cell code
+                  bytes in row-major order; cells past the maze edge are
+                  walls
+         -    16  number of further start and goal markers, 8 bytes each
+         -     -  row, col of every further start, then of every further
+                  goal, 8 bytes each
+
+Version 1 files end after the tiles and hold one start and one goal at
+most; they are still read.
+
+A TiledGrid reads tiles only when a lookup lands in them and keeps at most
+max_tiles of them, dropping the least recently used (and writing it back
+first if it was edited). The renderer asks for the cells in view and the
+player for the cell it steps into, so only tiles near the viewport are
+ever read. The external BFS solver works through the same store.
+
+Any maze converts with python -m maze.mazefile in.maze out.tiles; fields
+too large to build in memory are generated straight into tiles by
+save_obstacles() (python -m benchmarks.external --keep FILE).
+"""
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .grid import CHARS, COSTS, GOAL, OPEN, START, SYMBOLS, WALL, GridBase, cell_hash
+
+MAGIC = b'MAZT'
+VERSION = 2
+HEADER = struct.Struct('<4sHHQQqqqq')
+MARKERS = struct.Struct('<QQ')
+TILE = 256
+MAX_TILES = 1024            # 64 MiB of 256x256 tiles
+MIN_TILES = 8               # a tile and its neighbours must fit together
+
+
+def _pos(r, c):
+    return [] if r < 0 else [(r, c)]
+
+
+# Tile bytes on disk with an LRU of loaded tiles, each a flat bytearray
+class TileStore:
+    def __init__(self, path, max_tiles=MAX_TILES, writable=False):
+        self.path = path
+        self.file = open(path, 'r+b' if writable else 'rb')
+        magic, version, tile, rows, cols, sr, sc, gr, gc = HEADER.unpack(
+            self.file.read(HEADER.size).ljust(HEADER.size, b'\0'))
+        if magic != MAGIC:
+            raise ValueError("not a tiled maze file: bad magic")
+        if version not in (1, VERSION):
+            raise ValueError(f"unsupported tiled maze file version {version}")
+        self.rows, self.cols, self.tile = rows, cols, tile
+        self.tiles_down = -(-rows // tile)
+        self.tiles_across = -(-cols // tile)
+        count = self.tiles_down * self.tiles_across
+        size = os.fstat(self.file.fileno()).st_size
+        if size < self._offset(count) + (MARKERS.size if version > 1 else 0):
+            raise ValueError("tiled maze file is truncated")
+
+        self.starts, self.goals = _pos(sr, sc), _pos(gr, gc)
+        if version > 1:
+            self.file.seek(self._offset(count))
+            more_starts, more_goals = MARKERS.unpack(self.file.read(MARKERS.size))
+            cells = np.frombuffer(self.file.read(16 * (more_starts + more_goals)),
+                                  dtype='<i8')
+            if len(cells) != 2 * (more_starts + more_goals):
+                raise ValueError("tiled maze file is truncated")
+            cells = [tuple(p) for p in cells.reshape(-1, 2).tolist()]
+            self.starts += cells[:more_starts]
+            self.goals += cells[more_starts:]
+        for r, c in self.starts + self.goals:
+            if not (0 <= r < rows and 0 <= c < cols):
+                raise ValueError(f"tiled maze file marker {(r, c)} is outside the maze")
+
+        self.writable = writable
+        self.max_tiles = max(MIN_TILES, max_tiles)
+        self.loads = self.evictions = 0
+        self._tiles = OrderedDict()
+        self._dirty = set()
+        # The renderer and a background search may both page tiles in
+        self._lock = threading.Lock()
+
+    def _offset(self, index):
+        return HEADER.size + index * self.tile * self.tile
+
+    # Flat bytes of tile index; with dirty=True it is written back before
+    # being dropped. Writes into the bytes may be lost if another thread
+    # evicts the tile first, so shared stores are edited through put().
+    def get(self, index, dirty=False):
+        with self._lock:
+            data = self._fetch(index)
+            if dirty:
+                self._dirty.add(index)
+            return data
+
+    # Set one cell of a tile under the lock, so the tile cannot be evicted
+    # between loading it and writing; returns the code it held
+    def put(self, index, local, code):
+        with self._lock:
+            data = self._fetch(index)
+            old, data[local] = data[local], code
+            self._dirty.add(index)
+            return old
+
+    def _fetch(self, index):
+        data = self._tiles.get(index)
+        if data is None:
+            data = bytearray(self.tile * self.tile)
+            self.file.seek(self._offset(index))
+            self.file.readinto(data)
+            self.loads += 1
+            self._tiles[index] = data
+            while len(self._tiles) > self.max_tiles:
+                self._drop()
+        else:
+            self._tiles.move_to_end(index)
+        return data
+
+    def array(self, index, dirty=False):
+        return np.frombuffer(self.get(index, dirty), dtype=np.uint8).reshape(self.tile, self.tile)
+
+    def _drop(self):
+        index, data = self._tiles.popitem(last=False)
+        if index in self._dirty:
+            self._write(index, data)
+        self.evictions += 1
+
+    def _write(self, index, data):
+        self.file.seek(self._offset(index))
+        self.file.write(data)
+        self._dirty.discard(index)
+
+    def flush(self):
+        with self._lock:
+            for index in sorted(self._dirty):
+                self._write(index, self._tiles[index])
+            self.file.flush()
+
+    def close(self):
+        if self.writable:
+            self.flush()
+        self._tiles.clear()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Start a tiled file: header, room for every tile, then the markers past
+# the first start and goal. The tiles read back as open cells until
+# written, and on most filesystems take no space.
+def create(path, rows, cols, tile=TILE, starts=(), goals=()):
+    starts, goals = list(starts), list(goals)
+    sr, sc = starts[0] if starts else (-1, -1)
+    gr, gc = goals[0] if goals else (-1, -1)
+    count = -(-rows // tile) * -(-cols // tile)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, tile, rows, cols, sr, sc, gr, gc))
+        f.seek(HEADER.size + count * tile * tile)
+        f.write(MARKERS.pack(len(starts[1:]), len(goals[1:])))
+        f.write(np.array(starts[1:] + goals[1:], dtype='<i8').reshape(-1, 2).tobytes())
+
+
+# Write any grid out as tiles, one band of tile rows at a time
+def save_tiles(grid, path, tile=TILE):
+    create(path, grid.rows, grid.cols, tile, grid.starts, grid.goals)
+    across = -(-grid.cols // tile)
+    band = np.empty((tile, across * tile), dtype=np.uint8)
+    with open(path, 'r+b') as f:
+        f.seek(HEADER.size)
+        for r0 in range(0, grid.rows, tile):
+            r1 = min(grid.rows, r0 + tile)
+            band.fill(WALL)
+            band[:r1 - r0, :grid.cols] = grid.codes_window(r0, r1, 0, grid.cols)
+            for tc in range(across):
+                f.write(band[:, tc*tile:(tc + 1)*tile].tobytes())
+
+
+# Open field with walls at the given density, generated tile by tile so it
+# can be far larger than memory. Every tile draws from its own stream, so
+# the maze only depends on the seed and not on the order tiles are made in.
+def save_obstacles(path, rows, cols, seed=None, density=0.3, tile=TILE):
+    seed = np.random.SeedSequence(seed).entropy
+    create(path, rows, cols, tile, [(0, 0)], [(rows - 1, cols - 1)])
+    with TileStore(path, MIN_TILES, writable=True) as store:
+        for index in range(store.tiles_down * store.tiles_across):
+            tr, tc = divmod(index, store.tiles_across)
+            rng = np.random.default_rng([seed, index])
+            cells = store.array(index, dirty=True)
+            cells[:] = rng.random((tile, tile)) < density
+            cells[rows - tr*tile:, :] = WALL
+            cells[:, cols - tc*tile:] = WALL
+
+        def put(r, c, code):
+            index = (r // tile) * store.tiles_across + c // tile
+            store.put(index, (r % tile) * tile + c % tile, code)
+
+        # Keep the corners open so start and goal are not boxed in
+        for r in range(min(2, rows)):
+            for c in range(min(2, cols)):
+                put(r, c, OPEN)
+                put(rows - 1 - r, cols - 1 - c, OPEN)
+        put(0, 0, START)
+        put(rows - 1, cols - 1, GOAL)
+
+
+# Cell lookups by flat cell id, through the tile store
+class _TiledView:
+    def __init__(self, store, table):
+        self.store = store
+        self.table = table
+        self.size = store.rows * store.cols
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, cell):
+        store = self.store
+        t = store.tile
+        r, c = divmod(cell, store.cols)
+        tile = store.get((r // t) * store.tiles_across + c // t)
+        return self.table[tile[(r % t) * t + c % t]]
+
+
+# Grid backed by a tiled file. It offers the same lookups as Grid; windows
+# read only the tiles they overlap, while open_mask assembles the whole
+# maze and is only for mazes that fit in memory. Start and goal markers
+# come from the file. Edits need writable=True and go to the file.
+class TiledGrid(GridBase):
+    def __init__(self, path, max_tiles=MAX_TILES, writable=False):
+        self.store = TileStore(path, max_tiles, writable)
+        self.rows, self.cols = self.store.rows, self.store.cols
+        self.passable = _TiledView(self.store, (COSTS != 0).tolist())
+        self.costs = _TiledView(self.store, COSTS.tolist())
+        self.version = 0
+        self._edits = []
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.store.close()
+
+    def codes_window(self, r0, r1, c0, c1):
+        store, t = self.store, self.store.tile
+        out = np.empty((r1 - r0, c1 - c0), dtype=np.uint8)
+        for tr in range(r0 // t, (r1 - 1) // t + 1):
+            for tc in range(c0 // t, (c1 - 1) // t + 1):
+                tile = store.array(tr * store.tiles_across + tc)
+                a0, a1 = max(r0, tr*t), min(r1, (tr + 1)*t)
+                b0, b1 = max(c0, tc*t), min(c1, (tc + 1)*t)
+                out[a0 - r0:a1 - r0, b0 - c0:b1 - c0] = tile[a0 - tr*t:a1 - tr*t,
+                                                             b0 - tc*t:b1 - tc*t]
+        return out
+
+    def open_window(self, r0, r1, c0, c1):
+        return self.codes_window(r0, r1, c0, c1) != WALL
+
+    @property
+    def open_mask(self):
+        return self.open_window(0, self.rows, 0, self.cols)
+
+    @property
+    def cells(self):
+        return self.codes_window(0, self.rows, 0, self.cols)
+
+    def _locate(self, r, c):
+        t = self.store.tile
+        return (r // t) * self.store.tiles_across + c // t, (r % t) * t + c % t
+
+    def __getitem__(self, pos):
+        index, local = self._locate(*pos)
+        return CHARS[self.store.get(index)[local]]
+
+    def set_cell(self, r, c, symbol):
+        if not self.store.writable:
+            raise TypeError("tiled maze opened read-only; pass writable=True to edit")
+        code = SYMBOLS[symbol]
+        index, local = self._locate(r, c)
+        cell = r*self.cols + c
+        with self._lock:
+            old = self.store.put(index, local, code)
+            if self._fingerprint is not None:
+                self._fingerprint ^= cell_hash(cell, old) ^ cell_hash(cell, code)
+            self.version += 1
+            self._edits.append(cell)
+
+    def flush(self):
+        self.store.flush()
+
+    # Markers come from the file's marker list, in the order saved
+    def find_all(self, symbol):
+        return list({'S': self.store.starts, 'G': self.store.goals}.get(symbol, []))
+
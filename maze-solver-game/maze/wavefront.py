@@ -0,0 +1,85 @@
+import numpy as np
+
+
+# BFS distance field grown a whole frontier at a time with NumPy.
+# The grid is padded with a wall border so the four neighbour shifts on
+# flat indices never leave the array; unreachable cells stay at -1.
+# source is one (row, col) or a sequence of them: with several, the BFS
+# starts from all at once and each cell gets the distance to the nearest.
+def distance_field(grid, source, target=None, stats=None):
+    rows, cols = grid.rows, grid.cols
+    width = cols + 2
+
+    open_ = np.zeros((rows + 2, width), dtype=bool)
+    open_[1:-1, 1:-1] = grid.open_mask
+    open_ = open_.ravel()
+
+    dist = np.full(open_.size, -1, dtype=np.int32)
+    sources = np.asarray(source, dtype=np.intp).reshape(-1, 2)
+    src = np.unique((sources[:, 0]+1)*width + sources[:, 1]+1)
+    stop = (target[0]+1)*width + target[1]+1 if target is not None else None
+    dist[src] = 0
+
+    shifts = np.array([-width, width, -1, 1], dtype=np.intp)
+    frontier = src
+    # Scratch slot per cell used to drop duplicate neighbours in O(frontier):
+    # the last writer of each slot is the copy that is kept
+    owner = np.empty(open_.size, dtype=np.int32)
+    expanded = 0
+    d = 0
+
+    while frontier.size:
+        if stop is not None and dist[stop] >= 0:
+            break
+        d += 1
+        expanded += frontier.size
+        nbrs = (frontier[:, None] + shifts).ravel()
+        nbrs = nbrs[open_[nbrs] & (dist[nbrs] < 0)]
+        order = np.arange(nbrs.size, dtype=np.int32)
+        owner[nbrs] = order
+        nbrs = nbrs[owner[nbrs] == order]
+        dist[nbrs] = d
+        frontier = nbrs
+
+    if stats is not None:
+        stats['expanded'] = expanded
+    return np.ascontiguousarray(dist.reshape(rows + 2, width)[1:-1, 1:-1])
+
+
+# Walk a distance field downhill from pos to the cell at distance 0, i.e.
+# to the nearest source of a multi-source field
+def descend(dist, pos):
+    rows, cols = dist.shape
+    flat = memoryview(np.ascontiguousarray(dist).reshape(-1))
+    r, c = pos
+    cell = r*cols + c
+    d = flat[cell]
+    if d < 0:
+        return []
+
+    path = [(r, c)]
+    while d > 0:
+        d -= 1
+        if r > 0 and flat[cell - cols] == d:
+            cell -= cols
+            r -= 1
+        elif r < rows - 1 and flat[cell + cols] == d:
+            cell += cols
+            r += 1
+        elif c > 0 and flat[cell - 1] == d:
+            cell -= 1
+            c -= 1
+        else:
+            cell += 1
+            c += 1
+        path.append((r, c))
+
+    return path
+
+
+# Shortest path from the wavefront distance field, walked back from the goal
+def wavefront(grid, start, goal, stats=None):
+    dist = distance_field(grid, start, goal, stats)
+    path = descend(dist, goal)
+    path.reverse()
+    return path
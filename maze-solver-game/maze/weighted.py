@@ -0,0 +1,104 @@
+from array import array
+from heapq import heappush, heappop
+
+from .grid import MAX_COST, neighbours, rebuild
+
+# Cheapest paths over weighted terrain: a step into a cell costs
+# grid.costs[cell] (see grid.COSTS), so roads are preferred and mud and
+# water are avoided where a detour is cheaper.
+
+INF = 2**31 - 1
+
+
+# Total cost of walking a path, not counting the start cell
+def path_cost(grid, path):
+    costs = grid.costs
+    return sum(costs[grid.cell_id(pos)] for pos in path[1:])
+
+
+# Dijkstra with a binary heap; the baseline for dial()
+def dijkstra(grid, start, goal, stats=None):
+    rows, cols = grid.rows, grid.cols
+    open_ = grid.passable
+    costs = grid.costs
+    src = start[0]*cols + start[1]
+    dst = goal[0]*cols + goal[1]
+
+    parent = array('i', [-1]) * (rows*cols)
+    dist = array('i', [INF]) * (rows*cols)
+    dist[src] = 0
+    heap = [(0, src)]
+    path = []
+    expanded = 0
+
+    while heap:
+        d, cell = heappop(heap)
+        if d > dist[cell]:
+            continue
+        expanded += 1
+
+        if cell == dst:
+            path = rebuild(parent, dst, cols)
+            break
+
+        for n in neighbours(cell, rows, cols):
+            if open_[n]:
+                nd = d + costs[n]
+                if nd < dist[n]:
+                    dist[n] = nd
+                    parent[n] = cell
+                    heappush(heap, (nd, n))
+
+    if stats is not None:
+        stats['expanded'] = expanded
+    return path
+
+
+# Dial's algorithm: with integer step costs of at most MAX_COST, every
+# queued distance lies within MAX_COST of the one being settled, so a ring
+# of MAX_COST + 1 buckets replaces the heap and each push/pop is O(1)
+def dial(grid, start, goal, stats=None):
+    rows, cols = grid.rows, grid.cols
+    open_ = grid.passable
+    costs = grid.costs
+    src = start[0]*cols + start[1]
+    dst = goal[0]*cols + goal[1]
+
+    parent = array('i', [-1]) * (rows*cols)
+    dist = array('i', [INF]) * (rows*cols)
+    dist[src] = 0
+    width = MAX_COST + 1
+    buckets = [[] for _ in range(width)]
+    buckets[0].append(src)
+    queued = 1
+    d = 0
+    path = []
+    expanded = 0
+
+    while queued:
+        bucket = buckets[d % width]
+        while bucket:
+            cell = bucket.pop()
+            queued -= 1
+            if dist[cell] != d:
+                continue                        # superseded by a cheaper entry
+            expanded += 1
+
+            if cell == dst:
+                path = rebuild(parent, dst, cols)
+                queued = 0
+                break
+
+            for n in neighbours(cell, rows, cols):
+                if open_[n]:
+                    nd = d + costs[n]
+                    if nd < dist[n]:
+                        dist[n] = nd
+                        parent[n] = cell
+                        buckets[nd % width].append(n)
+                        queued += 1
+        d += 1
+
+    if stats is not None:
+        stats['expanded'] = expanded
+    return path
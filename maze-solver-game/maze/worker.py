@@ -0,0 +1,56 @@
+import queue
+import threading
+import time
+
+
+# Runs a step-wise search (see maze.search) on a background thread.
+# Steps are queued for the caller to poll(); notify() is called at most
+# every `interval` seconds, and always for the final step, so a UI can
+# wake up without being flooded. cancel() stops the search between steps.
+class SolveWorker:
+    def __init__(self, steps, notify=None, interval=1/60):
+        self.steps = steps
+        self.notify = notify
+        self.interval = interval
+        self.queue = queue.Queue()
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _run(self):
+        last = 0.0
+        try:
+            for step in self.steps:
+                if self.cancelled.is_set():
+                    return
+                self.queue.put(step)
+                now = time.monotonic()
+                if self.notify and (step.path is not None
+                                    or now - last >= self.interval):
+                    self.notify()
+                    last = now
+        finally:
+            self.finished.set()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    @property
+    def running(self):
+        return not self.finished.is_set() and not self.cancelled.is_set()
+
+    # All steps produced since the last poll
+    def poll(self):
+        out = []
+        while True:
+            try:
+                out.append(self.queue.get_nowait())
+            except queue.Empty:
+                return out
+
+    def join(self, timeout=None):
+        self.thread.join(timeout)
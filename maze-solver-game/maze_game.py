@@ -1,121 +1,609 @@
+import argparse
+import random
+
+import numpy as np
 import pygame
-from collections import deque
 
-# Initialize pygame
-pygame.init()
+from maze import Grid, GameState, SOLVERS
+from maze.grid import GOAL, MUD, OPEN, ROAD, START, WALL, WATER
+from maze.perf import FrameProfiler, TraceWriter
+from maze.replay import Recorder, build_grid
+from maze.tiles import TiledGrid
+from maze.worker import SolveWorker
+from maze.generate import GENERATORS
 
 # Window settings
 WIDTH, HEIGHT = 400, 300
-WIN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Maze Solver Game")
-
 CELL = 100
 
+# Cell size limits in pixels for zooming; larger mazes start at ZOOM_START
+# and scroll with the player
+ZOOM_MIN, ZOOM_MAX = 2, 100
+ZOOM_START = 12
+
+# Editable mazes up to DSTAR_MAX_CELLS default to the incremental planner,
+# whose path is repaired after wall edits. Its first plan costs several BFS
+# runs, so larger or read-only mazes are solved with BFS.
+ALGORITHM = 'dstar'
+DSTAR_MAX_CELLS = 128 * 128
+LARGE_ALGORITHM = 'bfs'
+# Tiled mazes may not fit in memory, so by default they are solved by the
+# external BFS and have no hints (a hint needs a distance field over the
+# whole maze)
+STREAMED_ALGORITHM = 'external'
+
+# Redraw cap and held-key repeat rate, configured independently
+FPS = 60
+INPUT_HZ = 12
+REPEAT_DELAY_MS = 200
+
+# Cells of the built-in maze that open and close on a timer
+DOORS = [(2, 2)]
+DOOR_MS = 2000
+DOOR_EVENT = pygame.USEREVENT
+
+# Posted by the solver thread when it has new search steps
+SEARCH_EVENT = pygame.USEREVENT + 1
+
+# Agents advance one cell per tick
+AGENT_MS = 100
+AGENT_EVENT = pygame.USEREVENT + 2
+
 # Maze layout
-maze = [
+MAZE = [
     ['S','0','1','0'],
     ['1','0','1','0'],
     ['0','0','0','G']
 ]
 
-ROWS, COLS = len(maze), len(maze[0])
-MOVES = [(-1,0),(1,0),(0,-1),(0,1)]
+HUD_KEY = pygame.K_F3
+
+KEYS = {
+    pygame.K_w: 'up',
+    pygame.K_s: 'down',
+    pygame.K_a: 'left',
+    pygame.K_d: 'right',
+}
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+GREY = (200, 200, 200)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+RED = (255, 0, 0)
+PURPLE = (150, 60, 200)
+VISITED = (173, 216, 230)
+FRONTIER = (255, 165, 0)
+TAN = (222, 184, 135)
+BROWN = (139, 95, 55)
+WATER_BLUE = (70, 130, 200)
+
+# Background colour of each cell code
+PALETTE = np.zeros((WATER + 1, 3), dtype=np.uint8)
+PALETTE[[OPEN, START, GOAL]] = WHITE
+PALETTE[WALL] = BLACK
+PALETTE[ROAD] = TAN
+PALETTE[MUD] = BROWN
+PALETTE[WATER] = WATER_BLUE
+
+
+# Draws the part of the maze inside a camera window that follows the
+# player. Walls and grid lines of the visible cells are pre-rendered to a
+# background surface; each frame only repaints visible cells whose look
+# changed and pushes just those rectangles to the display, so frame cost
+# depends on the window size rather than the maze size.
+class Renderer:
+    def __init__(self, win, grid, cell):
+        self.win = win
+        self.grid = grid
+        self.cell = cell
+        self.top = self.left = 0
+        self.background = None
+        self.version = grid.version
+        self.path = set()               # visible path cells
+        self.path_source = None
+        self.visited = None             # searched cells, a byte per cell id
+        self.frontier = set()           # made when a search first reports
+        self.player = None
+        self.goals = set()              # all goal markers
+        self.goal_source = None
+        self.agents = set()             # visible agent cells
+        self.full = True
+
+    # Rows and columns of cells that fit the window at the current zoom
+    def view_size(self):
+        width, height = self.win.get_size()
+        return (min(self.grid.rows, -(-height // self.cell)),
+                min(self.grid.cols, -(-width // self.cell)))
+
+    def zoom(self, factor):
+        cell = min(ZOOM_MAX, max(ZOOM_MIN, round(self.cell * factor)))
+        if cell != self.cell:
+            self.cell = cell
+            self.full = True
+
+    # Re-centre the camera once the player gets within a quarter of the edge
+    def follow(self, player):
+        rows, cols = self.view_size()
+        r, c = player
+        top, left = self.top, self.left
+        if not top + rows // 4 <= r < top + rows - rows // 4:
+            top = r - rows // 2
+        if not left + cols // 4 <= c < left + cols - cols // 4:
+            left = c - cols // 2
+        top = min(max(top, 0), self.grid.rows - rows)
+        left = min(max(left, 0), self.grid.cols - cols)
+        if (top, left) != (self.top, self.left):
+            self.top, self.left = top, left
+            self.full = True
+
+    def visible(self, pos):
+        rows, cols = self.view_size()
+        return (self.top <= pos[0] < self.top + rows
+                and self.left <= pos[1] < self.left + cols)
+
+    # Cell under a window pixel
+    def cell_at(self, x, y):
+        return self.top + y // self.cell, self.left + x // self.cell
+
+    # Walls, terrain and grid lines for the visible cells in one array blit
+    def render_background(self):
+        cell = self.cell
+        rows, cols = self.view_size()
+        block = self.grid.codes_window(self.top, self.top + rows,
+                                       self.left, self.left + cols)
+        pixels = PALETTE[block].repeat(cell, axis=0).repeat(cell, axis=1)
+        if cell >= 3:
+            for edge in (0, cell - 1):
+                pixels[edge::cell, :] = GREY
+                pixels[:, edge::cell] = GREY
+        self.background = pygame.Surface((cols*cell, rows*cell))
+        pygame.surfarray.blit_array(self.background, pixels.transpose(1, 0, 2))
+
+    def rect(self, pos):
+        return pygame.Rect((pos[1] - self.left)*self.cell,
+                           (pos[0] - self.top)*self.cell, self.cell, self.cell)
+
+    def paint_static(self, pos):
+        rect = self.rect(pos)
+        r, c = pos
+        code = self.grid.codes_window(r, r + 1, c, c + 1)[0, 0]
+        self.background.fill(PALETTE[code], rect)
+        if self.cell >= 3:
+            pygame.draw.rect(self.background, GREY, rect, 1)
+
+    # Repaint one cell from the background plus its overlays
+    def paint(self, pos):
+        rect = self.rect(pos)
+        self.win.blit(self.background, rect, rect)
+
+        if pos in self.goals:
+            self.win.fill(RED, rect)                    # Goal
+        elif pos == self.player:
+            self.win.fill(BLUE, rect)                   # Player
+        elif not self.grid.is_wall(*pos):
+            inner = rect.inflate(-2, -2) if self.cell >= 3 else rect
+            if pos in self.agents:
+                self.win.fill(PURPLE, inner)            # Agent
+            elif pos in self.path:
+                self.win.fill(GREEN, inner)             # Path
+            elif pos in self.frontier:
+                self.win.fill(FRONTIER, inner)          # Search frontier
+            elif self.visited is not None and self.visited[self.grid.cell_id(pos)]:
+                self.win.fill(VISITED, inner)           # Searched cells
+        return rect
+
+    def update_cells(self, cells):
+        rects = [self.paint(pos) for pos in cells if self.visible(pos)]
+        if rects:
+            pygame.display.update(rects)
+
+    # Repaint the visible cells under a window rectangle, without pushing
+    # them to the display
+    def repaint(self, rect):
+        top, left = self.cell_at(rect.left, rect.top)
+        bottom, right = self.cell_at(rect.right - 1, rect.bottom - 1)
+        for r in range(top, bottom + 1):
+            for c in range(left, right + 1):
+                if self.visible((r, c)):
+                    self.paint((r, c))
+
+    # Grow the search overlay with one step from a background search
+    def show_search(self, visited, frontier):
+        frontier = set(frontier)
+        dirty = frontier ^ self.frontier
+        if visited:
+            if self.visited is None:
+                self.visited = bytearray(self.grid.rows * self.grid.cols)
+            cols = self.grid.cols
+            for r, c in visited:
+                self.visited[r*cols + c] = 1
+            dirty.update(visited)
+        self.frontier = frontier
+        if not self.full:
+            self.update_cells(self.visible_path(dirty))
+
+    def clear_search(self):
+        dirty = set()
+        if not self.full:
+            dirty = self.visible_visited() | self.visible_path(self.frontier)
+        self.visited, self.frontier = None, set()
+        self.update_cells(dirty)
 
-# Find start and goal
-def find(symbol):
-    for i in range(ROWS):
-        for j in range(COLS):
-            if maze[i][j] == symbol:
-                return i, j
+    # Searched cells inside the camera window, read off the overlay mask
+    def visible_visited(self):
+        if self.visited is None:
+            return set()
+        rows, cols = self.view_size()
+        mask = np.frombuffer(self.visited, dtype=np.uint8).reshape(self.grid.rows,
+                                                                   self.grid.cols)
+        r, c = np.nonzero(mask[self.top:self.top + rows, self.left:self.left + cols])
+        return set(zip((r + self.top).tolist(), (c + self.left).tolist()))
 
-player = find('S')
-goal = find('G')
+    # Path cells inside the camera window
+    def visible_path(self, path):
+        rows, cols = self.view_size()
+        top, left = self.top, self.left
+        return {p for p in path
+                if top <= p[0] < top + rows and left <= p[1] < left + cols}
 
-# Draw maze and path
-def draw(path=[]):
-    WIN.fill((255, 255, 255))
+    # Agent cells inside the camera window, culled with array operations
+    # so off-screen agents cost nothing to draw
+    def visible_agents(self, positions):
+        if positions is None or not len(positions):
+            return set()
+        rows, cols = self.view_size()
+        r, c = positions[:, 0], positions[:, 1]
+        inside = ((r >= self.top) & (r < self.top + rows)
+                  & (c >= self.left) & (c < self.left + cols))
+        return set(map(tuple, positions[inside].tolist()))
 
-    for i in range(ROWS):
-        for j in range(COLS):
-            rect = pygame.Rect(j*CELL, i*CELL, CELL, CELL)
+    def draw(self, player, goals, path, agents=None):
+        old_player = self.player
+        self.player = player
+        if goals is not self.goal_source:
+            old_goals, self.goals = self.goals, set(goals)
+            self.goal_source = goals
+        else:
+            old_goals = self.goals
+        self.follow(player)
 
-            if maze[i][j] == '1':
-                pygame.draw.rect(WIN, (0, 0, 0), rect)        # Wall
-            elif (i, j) in path:
-                pygame.draw.rect(WIN, (0, 255, 0), rect)    # Path
+        edits = [self.grid.cell_pos(cell)
+                 for cell in self.grid.changed_since(self.version)]
+        self.version = self.grid.version
 
-            pygame.draw.rect(WIN, (200, 200, 200), rect, 1)
+        if self.full:
+            self.path_source = path
+            self.path = self.visible_path(path)
+            self.agents = self.visible_agents(agents)
+            self.render_background()
+            self.win.fill(WHITE)
+            self.win.blit(self.background, (0, 0))
+            for pos in (self.path | self.agents | self.visible_visited()
+                        | self.visible_path(self.frontier)):
+                self.paint(pos)
+            for pos in self.visible_path(self.goals | {player}):
+                self.paint(pos)
+            pygame.display.update()
+            self.full = False
+            return
 
-    # Player (Blue)
-    pygame.draw.rect(
-        WIN, (0, 0, 255),
-        (player[1]*CELL, player[0]*CELL, CELL, CELL)
-    )
+        dirty = set()
+        if path is not self.path_source:
+            shown = self.visible_path(path)
+            dirty = shown ^ self.path
+            self.path, self.path_source = shown, path
+        if player != old_player:
+            dirty |= {old_player, player}
+        if self.goals is not old_goals:
+            dirty |= self.goals ^ old_goals
+        shown = self.visible_agents(agents)
+        dirty |= shown ^ self.agents
+        self.agents = shown
 
-    # Goal (Red)
-    pygame.draw.rect(
-        WIN, (255, 0, 0),
-        (goal[1]*CELL, goal[0]*CELL, CELL, CELL)
-    )
+        # Pull wall edits into the background
+        for pos in edits:
+            if self.visible(pos):
+                self.paint_static(pos)
+                dirty.add(pos)
 
-    pygame.display.update()
+        self.update_cells(dirty)
 
-# BFS algorithm
-def bfs():
-    queue = deque([(player, [player])])
-    visited = set([player])
+# Timing overlay in the top-left corner: frame time percentiles and the
+# stats of the last finished solve
+class Hud:
+    def __init__(self, win, renderer):
+        self.win = win
+        self.renderer = renderer
+        self.font = pygame.font.Font(None, 18)
+        self.rect = None
 
-    while queue:
-        (x, y), path = queue.popleft()
+    def lines(self, prof):
+        p = prof.percentiles()
+        solve = prof.solve
+        took = f"{solve['time_s']*1e3:.1f} ms" if 'time_s' in solve else '-'
+        return [
+            f"frame p50 {p[50]:.1f}  p95 {p[95]:.1f}  p99 {p[99]:.1f} ms",
+            f"solve {took}  expanded {solve.get('expanded', '-')}",
+            f"frontier peak {solve.get('frontier_peak', '-')}",
+        ]
 
-        if (x, y) == goal:
-            return path
+    def draw(self, prof):
+        texts = [self.font.render(line, True, WHITE) for line in self.lines(prof)]
+        box = pygame.Rect(0, 0, max(t.get_width() for t in texts) + 8,
+                          sum(t.get_height() for t in texts) + 8)
+        dirty = box.union(self.rect) if self.rect else box
+        # Restore cells the old box covered before drawing the new one
+        if self.rect and not box.contains(self.rect):
+            self.renderer.repaint(self.rect)
+        self.win.fill(BLACK, box)
+        y = 4
+        for text in texts:
+            self.win.blit(text, (4, y))
+            y += text.get_height()
+        self.rect = box
+        pygame.display.update(dirty)
 
-        for dx, dy in MOVES:
-            nx, ny = x + dx, y + dy
+    def hide(self):
+        if self.rect:
+            self.renderer.repaint(self.rect)
+            pygame.display.update(self.rect)
+            self.rect = None
 
-            if (0 <= nx < ROWS and 0 <= ny < COLS
-                and maze[nx][ny] != '1'
-                and (nx, ny) not in visited):
 
-                visited.add((nx, ny))
-                queue.append(((nx, ny), path + [(nx, ny)]))
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Maze Solver Game")
+    parser.add_argument('--algorithm', choices=sorted(SOLVERS),
+                        help=f"default: {ALGORITHM} for editable mazes of up to "
+                             f"{DSTAR_MAX_CELLS} cells, {STREAMED_ALGORITHM} for .tiles "
+                             f"files, {LARGE_ALGORITHM} otherwise")
+    parser.add_argument('--file', help="load a .maze, .txt or .tiles maze file")
+    parser.add_argument('--generate', choices=sorted(GENERATORS),
+                        help="play a generated maze instead of the built-in one")
+    parser.add_argument('--rows', type=int, default=21)
+    parser.add_argument('--cols', type=int, default=31)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--density', type=float,
+                        help="wall density for the obstacles and terrain generators")
+    parser.add_argument('--goals', type=int, default=1,
+                        help="scatter extra goal markers until there are this many")
+    parser.add_argument('--agents', type=int, default=0,
+                        help="agents that walk to their nearest goal")
+    parser.add_argument('--hud', action='store_true',
+                        help="show the timing overlay (toggle with F3)")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="write per-frame timings as JSON Lines")
+    parser.add_argument('--record', metavar='FILE',
+                        help="log the session for python -m maze.replay")
+    parser.add_argument('--fps', type=int, default=FPS,
+                        help="maximum redraw rate")
+    parser.add_argument('--input-hz', type=int, default=INPUT_HZ,
+                        help="repeat rate for held movement keys")
+    return parser.parse_args(argv)
+
+
+# Everything needed to rebuild the same maze and game, as stored in a
+# replay log header
+def grid_spec(args):
+    spec = dict(goals=args.goals, seed=args.seed, algorithm=args.algorithm,
+                agents=args.agents)
+    if args.file:
+        spec['file'] = args.file
+    elif args.generate is None:
+        spec['text'] = Grid(MAZE).to_text()
+    else:
+        spec.update(generate=args.generate, rows=args.rows, cols=args.cols,
+                    density=args.density)
+    return spec
+
+
+def load_grid(args):
+    return build_grid(grid_spec(args))
+
+
+def default_algorithm(grid):
+    if isinstance(grid, TiledGrid):
+        return STREAMED_ALGORITHM
+    if isinstance(grid, Grid) and grid.rows * grid.cols <= DSTAR_MAX_CELLS:
+        return ALGORITHM
+    return LARGE_ALGORITHM
 
-    return []
 
 # Game loop
-running = True
-clock = pygame.time.Clock()
-path = []
-
-while running:
-    clock.tick(5)
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-        if event.type == pygame.KEYDOWN:
-            x, y = player
-
-            if event.key == pygame.K_w:
-                nx, ny = x-1, y
-            elif event.key == pygame.K_s:
-                nx, ny = x+1, y
-            elif event.key == pygame.K_a:
-                nx, ny = x, y-1
-            elif event.key == pygame.K_d:
-                nx, ny = x, y+1
-            elif event.key == pygame.K_SPACE:
-                path = bfs()
-                continue
-            else:
-                continue
-
-            if (0 <= nx < ROWS and 0 <= ny < COLS
-                and maze[nx][ny] != '1'):
-                player = (nx, ny)
-
-    draw(path)
-
-pygame.quit()
+def main(argv=None):
+    args = parse_args(argv)
+    # A recorded session must be reproducible, so it always has a seed
+    if args.record and args.seed is None:
+        args.seed = random.randrange(2**31)
+    grid = load_grid(args)
+    streamed = isinstance(grid, TiledGrid)
+    if args.algorithm is None:
+        args.algorithm = default_algorithm(grid)
+
+    pygame.init()
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Maze Solver Game")
+
+    # Shrink cells so the whole maze fits the window, down to ZOOM_START
+    cell = max(ZOOM_START, min(CELL, WIDTH // grid.cols, HEIGHT // grid.rows))
+    state = GameState(grid, args.algorithm)
+    renderer = Renderer(win, grid, cell)
+    doors = DOORS if args.generate is None and args.file is None else []
+    # Memory-mapped and tiled maze files are read-only
+    editable = isinstance(grid, Grid)
+    show_hint = False
+    worker = None
+    running = True
+    if doors:
+        pygame.time.set_timer(DOOR_EVENT, DOOR_MS)
+    if args.agents:
+        state.spawn(args.agents, args.seed)
+    if len(state.agents):
+        pygame.time.set_timer(AGENT_EVENT, AGENT_MS)
+
+    # Timing is only collected while the HUD or a trace is on
+    prof = hud = None
+    if args.hud or args.trace:
+        prof = FrameProfiler()
+    if args.trace:
+        prof.add_hook(TraceWriter(args.trace))
+    if args.hud:
+        hud = Hud(win, renderer)
+    recorder = Recorder(args.record, grid_spec(args)) if args.record else None
+    frame = 0
+
+    def record(action, *values):
+        if recorder is not None:
+            recorder.log(frame, action, *values)
+
+    # Held movement keys repeat at the input rate; redraws are capped at the
+    # frame rate and only happen when something changed
+    pygame.key.set_repeat(REPEAT_DELAY_MS, max(1, 1000 // args.input_hz))
+    frame_ms = max(1, 1000 // args.fps)
+    next_frame = 0
+    pending = True
+
+    # Solve on a background thread, showing the search as it grows. A path
+    # repaired after a move stays on show until the new one arrives, so
+    # moving again before then still finds it stale.
+    def start_search(keep_path=False):
+        nonlocal worker
+        stop_search()
+        record('solve')
+        if not keep_path:
+            state.path = []
+        worker = SolveWorker(
+            state.search_steps(),
+            notify=lambda: pygame.event.post(pygame.event.Event(SEARCH_EVENT)),
+        ).start()
+
+    # Any move or edit makes an in-flight search stale
+    def stop_search():
+        nonlocal worker
+        if worker is not None:
+            worker.cancel()
+            worker = None
+        renderer.clear_search()
+
+    while running:
+        # Block until there is input, or until the next frame is due
+        if pending:
+            wait = max(0, next_frame - pygame.time.get_ticks())
+            events = [pygame.event.wait(wait)] if wait else []
+        else:
+            events = [pygame.event.wait()]
+        events += pygame.event.get()
+        if prof is not None:
+            prof.begin_frame()
+
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+
+            elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                renderer.full = True
+                pending = True
+
+            elif event.type == SEARCH_EVENT and worker is not None:
+                for step in worker.poll():
+                    renderer.show_search(step.visited, step.frontier)
+                    if step.path is not None:
+                        state.path = step.path
+                        record('solved', len(step.path))
+                        if prof is not None and step.stats:
+                            prof.record_solve(step.stats)
+                        worker = None
+                        renderer.clear_search()
+                        pending = True
+                        break
+
+            elif event.type == AGENT_EVENT:
+                record('tick')
+                if state.step_agents():
+                    pending = True
+
+            elif event.type == DOOR_EVENT:
+                for pos in doors:
+                    record('toggle', *pos)
+                    if state.toggle_wall(pos):
+                        stop_search()
+                        pending = True
+                if state.stale:
+                    start_search()
+
+            # Left-click a cell to add or remove a wall; the wheel also
+            # sends presses of buttons 4 and 5, which only zoom
+            elif (event.type == pygame.MOUSEBUTTONDOWN and event.button == 1
+                  and editable):
+                pos = renderer.cell_at(*event.pos)
+                record('toggle', *pos)
+                if state.toggle_wall(pos):
+                    stop_search()
+                    if state.stale:
+                        start_search()
+                    pending = True
+
+            elif event.type == pygame.MOUSEWHEEL:
+                renderer.zoom(2 if event.y > 0 else 0.5)
+                pending = True
+
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    start_search()
+                elif event.key == pygame.K_h and not streamed:
+                    record('hint')
+                    show_hint = not show_hint
+                    pending = True
+                elif event.key == HUD_KEY:
+                    if hud is None:
+                        if prof is None:
+                            prof = FrameProfiler()
+                            prof.begin_frame()
+                        hud = Hud(win, renderer)
+                    else:
+                        hud.hide()
+                        hud = None
+                    pending = True
+                elif event.key in (pygame.K_EQUALS, pygame.K_PLUS):
+                    renderer.zoom(2)
+                    pending = True
+                elif event.key == pygame.K_MINUS:
+                    renderer.zoom(0.5)
+                    pending = True
+                elif event.key in KEYS:
+                    record(KEYS[event.key])
+                    if state.move(KEYS[event.key]):
+                        stop_search()
+                        if state.stale:
+                            start_search(keep_path=True)
+                        pending = True
+
+        if prof is not None:
+            prof.mark('events')
+
+        now = pygame.time.get_ticks()
+        if pending and running and now >= next_frame:
+            path = state.hint() if show_hint else state.path
+            if prof is not None:
+                prof.mark('hint')
+            renderer.draw(state.player, state.goals, path, state.agents.pos)
+            if prof is not None:
+                prof.mark('draw')
+                if hud is not None:
+                    hud.draw(prof)
+                    prof.mark('hud')
+                prof.end_frame()
+            pending = False
+            next_frame = now + frame_ms
+            frame += 1
+
+    stop_search()
+    if recorder is not None:
+        recorder.close(frame, state.player)
+    if prof is not None:
+        prof.close()
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()